@@ -0,0 +1,292 @@
+import bisect
+import datetime
+
+# Day numbers count from the Unix epoch, as datetime64[D] does
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+def load_numpy():
+    """Return the numpy module, or None if it is not installed
+    
+    Imported on first use: numpy takes longer to import than the whole CLI
+    takes to run, and most sessions never open the stats panel.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+class ColumnView:
+    """The store's sessions as parallel columns: date, completed and topic code
+    
+    Built on first refresh() and then kept current from the store's change
+    notifications: changed rows are rewritten in their slot and new rows
+    appended, so a refresh costs as much as the edits since the last one.
+    With NumPy the columns are arrays (datetime64[D] dates, bool status,
+    int32 codes into topics); without it they are lists of day numbers
+    (None for undated rows), bools and codes.
+    """
+    
+    def __init__(self, use_numpy=True):
+        self.use_numpy = use_numpy
+        self.np = None
+        self.sessions = None
+        self.topics = []  # topic code -> topic
+        self._topic_codes = {}
+        self._slots = {}  # row id -> slot in the columns
+        self._size = 0  # slots in use, including those of removed rows
+        self._pending = None  # row ids changed since the last refresh, None until built
+        self._dates = self._completed = self._codes = self._alive = None
+    
+    def attach(self, sessions):
+        """Follow the store; nothing is built until the first refresh()"""
+        self.sessions = sessions
+        sessions.add_listener(self._on_change)
+    
+    def _on_change(self, keys):
+        if self._pending is not None:
+            self._pending.update(keys)
+    
+    def refresh(self):
+        """Bring the columns up to date with the store; returns self"""
+        if self._pending is None:
+            self._build()
+        elif self._pending:
+            self._apply(self._pending)
+        self._pending = set()
+        return self
+    
+    def _topic_code(self, topic):
+        code = self._topic_codes.get(topic)
+        if code is None:
+            code = self._topic_codes[topic] = len(self.topics)
+            self.topics.append(topic)
+        return code
+    
+    def _build(self):
+        self.np = load_numpy() if self.use_numpy else None
+        days = []
+        completed = []
+        codes = []
+        slots = self._slots
+        topic_codes = self._topic_codes
+        day_of = {}  # date string -> day number; a schedule has far fewer dates than rows
+        for key, info in self.sessions.items():
+            slots[key] = len(days)
+            day = day_of.get(info.date_str, False)
+            if day is False:
+                day = day_of[info.date_str] = None if info.date is None else info.date.toordinal() - EPOCH_ORDINAL
+            days.append(day)
+            completed.append(info.completed)
+            code = topic_codes.get(info.topic)
+            codes.append(self._topic_code(info.topic) if code is None else code)
+        self._size = len(days)
+        
+        np = self.np
+        if np is None:
+            self._dates, self._completed, self._codes = days, completed, codes
+            self._alive = [True] * len(days)
+            return
+        # Room to append new rows without reallocating on every edit
+        capacity = max(len(days) * 5 // 4, 64)
+        self._dates = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[D]')
+        self._dates[:len(days)] = np.array(['NaT' if day is None else day for day in days], dtype='datetime64[D]')
+        self._completed = np.zeros(capacity, dtype=bool)
+        self._completed[:len(days)] = completed
+        self._codes = np.zeros(capacity, dtype=np.int32)
+        self._codes[:len(days)] = codes
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._alive[:len(days)] = True
+    
+    def _new_slot(self):
+        slot = self._size
+        self._size += 1
+        if self.np is None:
+            self._dates.append(None)
+            self._completed.append(False)
+            self._codes.append(0)
+            self._alive.append(False)
+        elif slot == len(self._alive):
+            np = self.np
+            grow = len(self._alive)
+            self._dates = np.concatenate([self._dates, np.full(grow, np.datetime64('NaT'), dtype='datetime64[D]')])
+            self._completed = np.concatenate([self._completed, np.zeros(grow, dtype=bool)])
+            self._codes = np.concatenate([self._codes, np.zeros(grow, dtype=np.int32)])
+            self._alive = np.concatenate([self._alive, np.zeros(grow, dtype=bool)])
+        return slot
+    
+    def _apply(self, keys):
+        for key in keys:
+            info = self.sessions.get(key)
+            slot = self._slots.get(key)
+            if info is None:
+                if slot is not None:
+                    # The slot stays empty; removals are rare enough not to compact
+                    self._alive[slot] = False
+                    del self._slots[key]
+                continue
+            if slot is None:
+                slot = self._slots[key] = self._new_slot()
+            if info.date is None:
+                self._dates[slot] = None if self.np is None else self.np.datetime64('NaT')
+            else:
+                day = info.date.toordinal() - EPOCH_ORDINAL
+                self._dates[slot] = day if self.np is None else self.np.datetime64(day, 'D')
+            self._completed[slot] = info.completed
+            self._codes[slot] = self._topic_code(info.topic)
+            self._alive[slot] = True
+    
+    def columns(self):
+        """(dates, completed, topic codes) of the current rows, in no particular order"""
+        size = self._size
+        if self.np is None:
+            alive = self._alive
+            return tuple([value for value, live in zip(column, alive) if live]
+                          for column in (self._dates, self._completed, self._codes))
+        alive = self._alive[:size]
+        return self._dates[:size][alive], self._completed[:size][alive], self._codes[:size][alive]
+
+class ProgressStats:
+    """Completion statistics computed from a ColumnView
+    
+    compute() returns a dict with:
+    - total, completed: task counts
+    - weekly: [(week start date, tasks, completed)] for the last `weeks`
+      weeks ending with the current one (weeks start on Monday)
+    - topics: [(topic, tasks, completed)], largest topics first
+    - current_streak, longest_streak: runs of scheduled days up to today with
+      every task complete; days without tasks don't break a run, and today
+      only counts once it is done
+    - backlog: [(date, overdue tasks)] at the end of each of those weeks
+    
+    Completion times are not recorded, so the backlog trend counts tasks that
+    are still incomplete now, not those that were incomplete back then.
+    """
+    
+    @staticmethod
+    def compute(view, today, weeks=12):
+        view.refresh()
+        today_day = today.toordinal() - EPOCH_ORDINAL
+        # Monday of the week `weeks - 1` weeks ago, then one boundary per week after it
+        first = today_day - today.weekday() - 7 * (weeks - 1)
+        edges = [first + 7 * week for week in range(weeks + 1)]
+        if view.np is None:
+            stats = ProgressStats._compute_python(view, today_day, edges)
+        else:
+            stats = ProgressStats._compute_numpy(view, today_day, edges)
+        
+        as_date = lambda day: datetime.date.fromordinal(day + EPOCH_ORDINAL)
+        stats['weekly'] = [(as_date(start), tasks, done)
+                           for start, tasks, done in zip(edges, stats['weekly_tasks'], stats['weekly_completed'])]
+        # Overdue means dated before the day, and the current week is only over up to today
+        cutoffs = [min(edge, today_day) for edge in edges[1:]]
+        stats['backlog'] = [(as_date(day), count) for day, count in zip(cutoffs, stats['backlog'])]
+        stats['topics'] = sorted(((view.topics[code], tasks, done)
+                                  for code, tasks, done in stats['topics'] if tasks),
+                                 key=lambda item: (-item[1], item[0]))
+        del stats['weekly_tasks'], stats['weekly_completed']
+        return stats
+    
+    @staticmethod
+    def _compute_numpy(view, today_day, edges):
+        np = view.np
+        dates, completed, codes = view.columns()
+        days = dates.astype(np.int64)
+        dated = ~np.isnat(dates)
+        weeks = len(edges) - 1
+        stats = {'total': len(completed), 'completed': int(np.count_nonzero(completed))}
+        
+        # Week of each dated task by binary search over the week boundaries
+        week = np.searchsorted(np.array(edges), days[dated], side='right') - 1
+        in_range = (week >= 0) & (week < weeks)
+        week = week[in_range]
+        week_done = completed[dated][in_range]
+        stats['weekly_tasks'] = np.bincount(week, minlength=weeks).tolist()
+        stats['weekly_completed'] = np.bincount(week, weights=week_done, minlength=weeks).astype(np.int64).tolist()
+        
+        topic_tasks = np.bincount(codes, minlength=len(view.topics))
+        topic_done = np.bincount(codes, weights=completed, minlength=len(view.topics)).astype(np.int64)
+        stats['topics'] = list(zip(range(len(view.topics)), topic_tasks.tolist(), topic_done.tolist()))
+        
+        # Scheduled days up to today, and whether each has no incomplete task left
+        past = dated & (days <= today_day)
+        day_list, inverse = np.unique(days[past], return_inverse=True)
+        pending = np.bincount(inverse.ravel(), weights=~completed[past], minlength=len(day_list))
+        day_done = pending == 0
+        if len(day_list) and day_list[-1] == today_day and not day_done[-1]:
+            # Today isn't over yet
+            day_done = day_done[:-1]
+        # Run lengths from the positions where day_done flips
+        flips = np.flatnonzero(np.diff(np.concatenate(([False], day_done, [False])).astype(np.int8)))
+        runs = flips[1::2] - flips[::2]
+        stats['longest_streak'] = int(runs.max()) if len(runs) else 0
+        stats['current_streak'] = int(runs[-1]) if len(runs) and flips[-1] == len(day_done) else 0
+        
+        overdue = np.sort(days[dated & ~completed])
+        cutoffs = [min(edge, today_day) for edge in edges[1:]]
+        stats['backlog'] = np.searchsorted(overdue, cutoffs, side='left').tolist()
+        return stats
+    
+    @staticmethod
+    def _compute_python(view, today_day, edges):
+        dates, completed, codes = view.columns()
+        weeks = len(edges) - 1
+        stats = {'total': len(completed), 'completed': sum(completed)}
+        weekly_tasks = [0] * weeks
+        weekly_completed = [0] * weeks
+        topic_tasks = [0] * len(view.topics)
+        topic_done = [0] * len(view.topics)
+        pending = {}  # scheduled day up to today -> incomplete tasks on it
+        overdue = []
+        
+        for day, done, code in zip(dates, completed, codes):
+            topic_tasks[code] += 1
+            topic_done[code] += done
+            if day is None:
+                continue
+            week = bisect.bisect_right(edges, day) - 1
+            if 0 <= week < weeks:
+                weekly_tasks[week] += 1
+                weekly_completed[week] += done
+            if day <= today_day:
+                pending[day] = pending.get(day, 0) + (not done)
+            if not done:
+                overdue.append(day)
+        stats['weekly_tasks'] = weekly_tasks
+        stats['weekly_completed'] = weekly_completed
+        stats['topics'] = list(zip(range(len(view.topics)), topic_tasks, topic_done))
+        
+        day_done = [pending[day] == 0 for day in sorted(pending)]
+        if pending and max(pending) == today_day and not day_done[-1]:
+            # Today isn't over yet
+            day_done.pop()
+        run = longest = 0
+        for done in day_done:
+            run = run + 1 if done else 0
+            longest = max(longest, run)
+        stats['longest_streak'] = longest
+        stats['current_streak'] = run
+        
+        overdue.sort()
+        stats['backlog'] = [bisect.bisect_left(overdue, min(edge, today_day)) for edge in edges[1:]]
+        return stats
+    
+    @staticmethod
+    def format_report(stats):
+        """Plain-text report of compute()'s result for the stats panel"""
+        def rate(done, tasks):
+            return f"{done / tasks:.0%}" if tasks else "-"
+        
+        total, done = stats['total'], stats['completed']
+        lines = [
+            f"Tasks: {total:,}    Completed: {done:,} ({rate(done, total)})",
+            f"Current streak: {stats['current_streak']} day(s)    Longest: {stats['longest_streak']} day(s)",
+            "",
+            f"{'Week of':<12}{'Tasks':>8}{'Done':>8}{'Rate':>7}{'Overdue':>10}",
+        ]
+        for (start, tasks, week_done), (_, overdue) in zip(stats['weekly'], stats['backlog']):
+            lines.append(f"{start.isoformat():<12}{tasks:>8,}{week_done:>8,}{rate(week_done, tasks):>7}{overdue:>10,}")
+        lines += ["", f"{'Topic':<40}{'Tasks':>8}{'Done':>8}{'Rate':>7}"]
+        for topic, tasks, topic_done in stats['topics']:
+            lines.append(f"{topic[:39]:<40}{tasks:>8,}{topic_done:>8,}{rate(topic_done, tasks):>7}")
+        return "\n".join(lines)
@@ -1,57 +1,29 @@
-import tkinter as tk
-from file_selection import FileSelectionFrame
-from csv_loader import CSVLoader
-from main_interface import MainInterface
-from task_actions import TaskActions
+import sys
 
-class LearningTracker(tk.Tk):
-    def __init__(self):
-        super().__init__()
-        self.title("Learning Schedule Tracker")
-        self.geometry("800x600")
-        
-        self.current_file = None
-        self.sessions = {}
-        
-        # Initialize components
-        self.csv_loader = CSVLoader()
-        self.main_interface = MainInterface(self)
-        self.task_actions = TaskActions(self)
-        
-        # Start with file selection
-        self.show_file_selection()
+def main():
+    """Run a batch command (see cli.py), or else the GUI"""
+    if len(sys.argv) > 1 and not sys.argv[1].startswith("-"):
+        # Batch commands run without a display: hand over before tkinter is imported
+        import cli
+        return cli.main()
     
-    def show_file_selection(self):
-        """Show the file selection interface"""
-        # Clear current widgets
-        for widget in self.winfo_children():
-            widget.destroy()
-        
-        # Show file selection frame
-        self.file_frame = FileSelectionFrame(self, self.load_schedule)
-        self.file_frame.pack(expand=True, fill="both")
+    import argparse
+    from learning_tracker import LearningTracker
+    from perf import tracer
+    parser = argparse.ArgumentParser(description="Learning Schedule Tracker")
+    parser.add_argument("--trace", metavar="FILE",
+                        help=f"write a Chrome trace (chrome://tracing) of timed operations to FILE "
+                             f"(or set {tracer.TRACE_ENV})")
+    parser.add_argument("--perf", action="store_true",
+                        help=f"show the timing of the latest operation under the status bar (or set {tracer.PERF_ENV})")
+    args = parser.parse_args()
+    tracer.configure(args.trace, args.perf)
     
-    def load_schedule(self, file_path):
-        """Load schedule from selected file"""
-        self.current_file = file_path
-        self.sessions = self.csv_loader.load_schedule(file_path)
-        
-        if self.sessions is not None:
-            self.show_main_interface()
-    
-    def show_main_interface(self):
-        """Show the main interface"""
-        # Clear current widgets
-        for widget in self.winfo_children():
-            widget.destroy()
-        
-        # Setup main interface
-        self.main_interface.setup_main_interface()
-    
-    def populate_tree(self):
-        """Delegate to main interface"""
-        self.main_interface.populate_tree()
-
-if __name__ == "__main__":
     app = LearningTracker()
     app.mainloop()
+
+if __name__ == "__main__":
+    # Imports stay inside main(): the workspace's process pool workers are
+    # spawned, so they import this script again (as __mp_main__) and must
+    # not pull in tkinter
+    sys.exit(main())
@@ -0,0 +1,292 @@
+"""Headless benchmarks for loading, categorizing, refreshing, progress stats, saving and exporting schedules
+
+Usage:
+    python benchmark.py [--sizes 1000 10000 100000 1000000] [--notes short long]
+                        [--repeat 3] [--output results.json]
+                        [--compare baseline.json] [--tolerance 0.25] [--tk]
+
+Each run generates synthetic schedules in a temp directory, times every
+operation (best of --repeat runs), measures its peak Python allocation with
+tracemalloc in a separate run, and writes everything to JSON. With --compare,
+operations that got slower than the baseline by more than --tolerance are
+reported and the exit status is 1, so it can gate a rollout.
+
+populate_tree runs against a stub Treeview unless --tk is given and a display
+(e.g. Xvfb) is available, in which case the real VirtualTreeview is used.
+"""
+import argparse
+import csv
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from analytics import ColumnView, ProgressStats
+from csv_loader import CSVLoader
+from schedule_cache import ScheduleCache
+from search_index import SearchIndex
+from session_store import SessionStore
+from storage import CSVStorage, open_storage
+from main_interface import MainInterface
+from task_actions import TaskActions
+
+# Multi-KB markdown note in the style of Lists of Tasks/template.csv
+LONG_NOTE = """### 📘 **Key Concepts Covered**
+
+#### 1. Concept 1
+* Explanation or formula
+
+#### 2. Concept 2
+* Explanation or formula
+
+#### 3. Practical Tips
+* Real-world application advice
+
+---
+
+### ✅ **Tasks Completed**
+* Solved 10 practice questions
+* Demonstrated understanding of key formulas
+""" * 6
+
+SHORT_NOTE = "Reviewed chapter, did practice set"
+
+TOPICS = ["Electrical Math Foundations", "Safety Procedures", "Technical Standards",
+          "Component Identification", "Project Planning", "Tools and Templates", "Review"]
+
+# Rows the stub Treeview materializes, roughly one screenful plus overscan
+STUB_VIEWPORT = 50
+
+class StubTreeview:
+    """Stand-in for VirtualTreeview that builds only a viewport's worth of rows"""
+    
+    def __init__(self, row_builder):
+        self.row_builder = row_builder
+        self.rows = []
+    
+    def set_rows(self, rows):
+        self.rows = rows
+        for iid in rows[:STUB_VIEWPORT]:
+            self.row_builder(iid)
+    
+    def contains(self, iid):
+        return iid in self.rows
+    
+    def index(self, iid):
+        return self.rows.index(iid)
+    
+    def update_row(self, iid):
+        self.row_builder(iid)
+    
+    def insert_row(self, position, iid):
+        self.rows.insert(position, iid)
+    
+    def delete_row(self, iid):
+        self.rows.remove(iid)
+    
+    def selection(self):
+        return ()
+
+class BenchApp:
+    """Minimal stand-in for LearningTracker with the attributes the components use"""
+    
+    def __init__(self, file_path, sessions):
+        self.current_file = file_path
+        self.sessions = sessions
+        self.storage = CSVStorage(file_path)
+        self.is_loading = False
+        self.task_actions = TaskActions(self)
+        self.main_interface = MainInterface(self)
+        self.tree = None
+
+def generate_schedule(path, rows, notes):
+    """Write a saved-format schedule centred on today, so every category has rows"""
+    rng = random.Random(rows)
+    start = datetime.date.today() - datetime.timedelta(days=rows // 2)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Date', 'Focus Topic', 'Suggested Tasks', 'Status', 'Notes'])
+        for i in range(rows):
+            completed = rng.random() < 0.4
+            writer.writerow([
+                (start + datetime.timedelta(days=i)).isoformat(),
+                rng.choice(TOPICS),
+                "Review foundational concepts and solve sample problems",
+                "Complete" if completed else "Pending",
+                (LONG_NOTE if notes == "long" else SHORT_NOTE) if completed else ""
+            ])
+
+def load_schedule(path, cache=None):
+    """Load the way LearningTracker.load_schedule does, minus Tk; returns the store
+    
+    Batches from the storage backend are merged into a store with the search
+    index and column view listening, as in the app, and journaled edits are
+    replayed at the end.
+    """
+    storage = open_storage(path, cache)
+    sessions = SessionStore()
+    SearchIndex().attach(sessions)
+    ColumnView().attach(sessions)
+    for batch, row_errors, progress in storage.iter_batches():
+        sessions.add_many(batch)
+    storage.attach(sessions)
+    storage.close()
+    return sessions
+
+def measure(func, repeat):
+    """Return (best seconds over repeat runs, peak traced bytes of one extra run)"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+def make_tree(app, use_tk):
+    if use_tk and os.environ.get("DISPLAY"):
+        import tkinter as tk
+        from virtual_tree import VirtualTreeview
+        root = tk.Tk()
+        root.geometry("800x600")
+        tree = VirtualTreeview(root, ("Date", "Topic", "Suggested Tasks", "Status", "Notes"),
+                               app.main_interface.build_row)
+        tree.pack(fill="both", expand=True)
+        root.update()
+        return tree, root
+    return StubTreeview(app.main_interface.build_row), None
+
+def bench_size(rows, notes, repeat, use_tk, workdir):
+    """Run every operation on one synthetic schedule"""
+    path = os.path.join(workdir, f"schedule_{rows}_{notes}.csv")
+    generate_schedule(path, rows, notes)
+    results = []
+    
+    def record(operation, func):
+        seconds, peak = measure(func, repeat)
+        results.append({
+            "rows": rows,
+            "notes": notes,
+            "operation": operation,
+            "seconds": round(seconds, 6),
+            "peak_bytes": peak,
+        })
+        print(f"  {operation:<28} {seconds * 1000:10.1f} ms  {peak / 1024 / 1024:8.1f} MiB")
+    
+    record("load_schedule", lambda: load_schedule(path))
+    # Reopening an unchanged file is served from the parse cache
+    cache = ScheduleCache(os.path.join(workdir, "cache"))
+    storage = open_storage(path, cache)
+    for batch in storage.iter_batches():
+        pass
+    storage.write_cache()
+    record("load_schedule (cached)", lambda: load_schedule(path, cache))
+    sessions = load_schedule(path)
+    record("search_index", lambda: SearchIndex.build(sessions.snapshot()))
+    app = BenchApp(path, sessions)
+    app.tree, root = make_tree(app, use_tk)
+    
+    def categorize_cold():
+        sessions._categories_key = None
+        CSVLoader.categorize_dates(sessions)
+    
+    def populate_cold():
+        sessions._categories_key = None
+        app.main_interface.populate_tree()
+        if root is not None:
+            root.update()
+    
+    record("categorize_dates", categorize_cold)
+    record("categorize_dates (cached)", lambda: CSVLoader.categorize_dates(sessions))
+    record("populate_tree", populate_cold)
+    
+    view = ColumnView()
+    view.attach(sessions)
+    
+    def progress_stats_cold():
+        view._pending = None
+        ProgressStats.compute(view, datetime.date.today())
+    
+    record("progress_stats", progress_stats_cold)
+    record("progress_stats (built)", lambda: ProgressStats.compute(view, datetime.date.today()))
+    
+    # save_progress minus its message box: same writer, backups and journal compaction
+    record("save_progress", lambda: app.task_actions.write_schedule(app.task_actions.backup_generations))
+    record("generate_export_content", lambda: app.task_actions.generate_export_content(list(sessions.keys())))
+    export_path = os.path.join(workdir, "export.txt")
+    record("export_all_to_file", lambda: app.task_actions.write_export(export_path, list(sessions.keys())))
+    
+    if root is not None:
+        root.destroy()
+    return results
+
+def compare(results, baseline_path, tolerance):
+    """Print operations slower than the baseline by more than tolerance; return the count"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r["rows"], r["notes"], r["operation"]): r for r in json.load(f)["results"]}
+    
+    regressions = 0
+    print(f"\nComparison against {baseline_path} (tolerance {tolerance:.0%}):")
+    for result in results:
+        old = baseline.get((result["rows"], result["notes"], result["operation"]))
+        if old is None or not old["seconds"]:
+            continue
+        ratio = result["seconds"] / old["seconds"]
+        flag = ""
+        if ratio > 1 + tolerance:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {result['rows']:>8} {result['notes']:<5} {result['operation']:<28} {ratio:6.2f}x{flag}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark schedule load, categorize, refresh, save and export")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000])
+    parser.add_argument("--notes", nargs="+", choices=["short", "long"], default=["short", "long"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--tk", action="store_true", help="use a real Treeview when a display is available")
+    args = parser.parse_args(argv)
+    
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for notes in args.notes:
+            for rows in args.sizes:
+                print(f"{rows} rows, {notes} notes:")
+                results.extend(bench_size(rows, notes, args.repeat, args.tk, workdir))
+    
+    output = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2)
+    print(f"\nResults written to {args.output}")
+    
+    if args.compare and compare(results, args.compare, args.tolerance):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+"""Headless commands for cron jobs and scripts: python app.py <command> [options]
+
+Nothing here imports tkinter or pyperclip, so the commands run without a
+display and start in tens of milliseconds.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+from csv_loader import CSVLoader
+from perf import tracer
+from session import Session
+from session_store import SessionStore
+from storage import open_storage
+from task_export import TaskExport
+
+# Written by the file selection screen; the default schedule for every command
+LAST_FILE = "last_file.json"
+
+def last_file():
+    try:
+        with open(LAST_FILE, "r") as f:
+            return json.load(f).get("last_file")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+def load(file_path):
+    """Open a schedule through its storage backend, replaying journaled edits
+    
+    Returns (storage, sessions); row errors are reported on stderr.
+    """
+    storage = open_storage(file_path)
+    sessions = SessionStore()
+    errors = []
+    with tracer.span("load_schedule", file=os.path.basename(file_path)) as span:
+        for batch, batch_errors, progress in storage.iter_batches():
+            sessions.add_many(batch)
+            errors.extend(batch_errors)
+        storage.attach(sessions)
+        span.set(rows=len(sessions))
+    if errors:
+        print(CSVLoader.format_row_errors(errors), file=sys.stderr)
+    return storage, sessions
+
+def incomplete_keys(sessions, until):
+    """Row ids of incomplete tasks dated up to and including until, in date order"""
+    completed = sessions.completed_keys()
+    return [key for key in sessions.sorted_keys(end=until + datetime.timedelta(days=1)) if key not in completed]
+
+def parse_date(text):
+    date = Session.parse_date(text)
+    if date is None:
+        raise argparse.ArgumentTypeError(f"invalid date {text!r}, expected YYYY-MM-DD")
+    return date
+
+def cmd_incomplete(storage, sessions, args):
+    """List tasks dated today (or --until) or earlier that are not complete"""
+    keys = incomplete_keys(sessions, args.until)
+    for key in keys:
+        info = sessions[key]
+        print(f"{info.date_str}  {info.topic} - {info.suggested_tasks[:60]}")
+    print(f"{len(keys)} incomplete task(s) up to {args.until.isoformat()}", file=sys.stderr)
+    return 0
+
+def cmd_export(storage, sessions, args):
+    """Write the text export of all (or only incomplete) tasks to a file or stdout"""
+    if args.incomplete:
+        keys = incomplete_keys(sessions, args.until)
+        title = TaskExport.INCOMPLETE_TITLE
+    else:
+        keys = list(sessions.keys())
+        title = TaskExport.ALL_TITLE
+    snapshot = sessions.snapshot()
+    with tracer.span("export_file", rows=len(keys)):
+        if args.output is None:
+            # Same encoding as exported files, whatever the locale of a cron job
+            sys.stdout.reconfigure(encoding='utf-8')
+            TaskExport.write(sys.stdout, snapshot, keys, args.title or title)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                TaskExport.write(f, snapshot, keys, args.title or title)
+            print(f"Exported {len(keys)} task(s) to {args.output}", file=sys.stderr)
+    return 0
+
+def cmd_complete(storage, sessions, args):
+    """Mark every task on a date complete (or pending with --undo) and save"""
+    date_str = args.date.isoformat()
+    keys = sessions.keys_for_date(date_str)
+    if not keys:
+        print(f"No tasks on {date_str}", file=sys.stderr)
+        return 1
+    
+    changed = [key for key in keys if sessions[key].completed == args.undo]
+    for key in changed:
+        sessions.update(key, completed=not args.undo)
+    if changed:
+        snapshot = sessions.snapshot()
+        with tracer.span("save_progress", rows=len(snapshot)) as span:
+            span.set(bytes=storage.save(snapshot, args.backups))
+        sessions.mark_clean(snapshot.version)
+    status = "pending" if args.undo else "complete"
+    print(f"Marked {len(changed)} of {len(keys)} task(s) on {date_str} {status}")
+    return 0
+
+def cmd_stats(storage, sessions, args):
+    """Print completion counts overall and per date category"""
+    completed = sessions.completed_keys()
+    total = len(sessions)
+    done = len(completed)
+    print(f"Tasks:      {total}")
+    print(f"Completed:  {done} ({done / total:.0%})" if total else "Completed:  0")
+    print(f"Pending:    {total - done}")
+    print(f"Overdue:    {len(incomplete_keys(sessions, args.today - datetime.timedelta(days=1)))}")
+    print(f"Topics:     {len(sessions.topics())}")
+    for category, keys in CSVLoader.categorize_dates(sessions, args.today).items():
+        pending = sum(1 for key in keys if key not in completed)
+        print(f"  {category + ':':<18}{len(keys):>7} tasks, {pending} pending")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="app.py", description="Learning Schedule Tracker batch commands")
+    parser.add_argument("--trace", metavar="FILE", help="write a Chrome trace of the command to FILE")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    def add(name, func):
+        subparser = subparsers.add_parser(name, help=func.__doc__, description=func.__doc__)
+        subparser.add_argument("--file", help="CSV file, database or folder (default: the last file opened)")
+        subparser.set_defaults(func=func)
+        return subparser
+    
+    today = datetime.date.today()
+    subparser = add("incomplete", cmd_incomplete)
+    subparser.add_argument("--until", type=parse_date, default=today, help="last date to include (default: today)")
+    
+    subparser = add("export", cmd_export)
+    subparser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    subparser.add_argument("--incomplete", action="store_true", help="only incomplete tasks up to --until")
+    subparser.add_argument("--until", type=parse_date, default=today, help="last date for --incomplete (default: today)")
+    subparser.add_argument("--title", help="heading of the export")
+    
+    subparser = add("complete", cmd_complete)
+    subparser.add_argument("date", type=parse_date, help="date of the tasks, YYYY-MM-DD")
+    subparser.add_argument("--undo", action="store_true", help="mark the tasks pending instead")
+    subparser.add_argument("--backups", type=int, default=0, help="backup generations to rotate (default: 0)")
+    
+    subparser = add("stats", cmd_stats)
+    subparser.set_defaults(today=today)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tracer.configure(args.trace)
+    
+    file_path = args.file or last_file()
+    if not file_path or not os.path.exists(file_path):
+        print("No schedule given and no last file found; use --file", file=sys.stderr)
+        return 2
+    
+    try:
+        storage, sessions = load(file_path)
+    except Exception as e:
+        print(f"Failed to load {file_path}: {e}", file=sys.stderr)
+        return 1
+    try:
+        return args.func(storage, sessions, args)
+    except BrokenPipeError:
+        # Output piped into e.g. head, which stopped reading; don't fail again at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    except Exception as e:
+        print(f"{args.command} failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        storage.close()
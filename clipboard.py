@@ -0,0 +1,80 @@
+import tempfile
+
+class TkClipboard:
+    """Tk's own clipboard on the application's root window
+    
+    The app itself serves the clipboard contents, so copying is a memory
+    copy: no subprocess, no clipboard tool and no extra dependency.
+    """
+    
+    name = "Tk"
+    
+    def __init__(self, root):
+        from tkinter import TclError
+        self.root = root
+        self.errors = TclError  # e.g. the display refused to make the app the clipboard owner
+    
+    def copy(self, text):
+        self.root.clipboard_clear()
+        self.root.clipboard_append(text)
+
+class PyperclipClipboard:
+    """pyperclip, which shells out to xclip/xsel on Linux"""
+    
+    name = "pyperclip"
+    errors = ()
+    
+    def __init__(self, pyperclip):
+        self.pyperclip = pyperclip
+    
+    def copy(self, text):
+        self.pyperclip.copy(text)
+
+class Clipboard:
+    """Where clipboard exports go, with the backend chosen once at startup
+    
+    Exports longer than file_threshold characters are written to a
+    temporary file instead of being held in memory for the clipboard. If
+    Tk's clipboard fails, copies go through pyperclip from then on, when it
+    is installed.
+    """
+    
+    FILE_THRESHOLD = 1000000
+    
+    def __init__(self, backend, file_threshold=FILE_THRESHOLD):
+        self.backend = backend  # TkClipboard, PyperclipClipboard or None
+        self.file_threshold = file_threshold
+    
+    @staticmethod
+    def resolve(root=None):
+        """Tk's clipboard when there is a Tk root, else pyperclip if it is installed"""
+        if root is not None:
+            return Clipboard(TkClipboard(root))
+        return Clipboard(Clipboard.load_pyperclip())
+    
+    @staticmethod
+    def load_pyperclip():
+        """PyperclipClipboard, or None if pyperclip is not installed"""
+        try:
+            import pyperclip
+        except ImportError:
+            return None
+        return PyperclipClipboard(pyperclip)
+    
+    def copy(self, text):
+        if self.backend is None:
+            raise RuntimeError("No clipboard available: run the app with a display or install pyperclip")
+        try:
+            self.backend.copy(text)
+        except self.backend.errors as e:
+            fallback = Clipboard.load_pyperclip()
+            if fallback is None:
+                raise RuntimeError(f"{self.backend.name} clipboard failed ({e}) and pyperclip is not installed") from e
+            self.backend = fallback
+            self.backend.copy(text)
+    
+    @staticmethod
+    def temp_file():
+        """Open a new temporary text file for an export too large for the clipboard"""
+        return tempfile.NamedTemporaryFile('w', encoding='utf-8', prefix='learning_tracker_export_',
+                                           suffix='.txt', delete=False)
@@ -1,75 +1,163 @@
 import csv
 import datetime
-from tkinter import messagebox
+import os
+from session import Session
+from lazy_notes import LazyNote, NoteSource, OffsetLineReader
+from session_store import SessionStore
+from edit_journal import EditJournal
+from perf import tracer
 
 class CSVLoader:
+    # Columns every schedule file must have
+    REQUIRED_COLUMNS = ('Date', 'Focus Topic')
+    
     @staticmethod
-    def load_schedule(file_path):
-        """Load schedule from CSV file"""
-        sessions = {}
+    def replay_journal(file_path, sessions):
+        """Apply edits journaled since the file was last saved
         
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Handle both original format (with day) and saved format (without day)
-                    date_str = row['Date'].split(' ')[0]  # Extract just the date part
-                    
-                    # Check if this is a saved file with Status column
-                    if 'Status' in row:
-                        # Load saved format with completion status and notes
-                        sessions[date_str] = {
-                            'topic': row['Focus Topic'],
-                            'suggested_tasks': row.get('Suggested Tasks', ''),
-                            'completed': row['Status'] == 'Complete',
-                            'notes': row.get('Notes', '')
-                        }
-                    else:
-                        # Load original format
-                        sessions[date_str] = {
-                            'topic': row['Focus Topic'],
-                            'suggested_tasks': row.get('Suggested Tasks', ''),
-                            'completed': False,
-                            'notes': ''
-                        }
-            
-            return sessions
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to load CSV file: {str(e)}")
-            return None
+        The store is marked clean first, so replayed edits count as unsaved
+        until the next save folds them into the CSV.
+        """
+        sessions.mark_clean(sessions.version)
+        return EditJournal(file_path).replay_into(sessions)
+    
+    @staticmethod
+    def parse_row(row):
+        """Turn one CSV row into a Session"""
+        # Short rows leave trailing columns as None
+        for column in CSVLoader.REQUIRED_COLUMNS:
+            if row.get(column) is None:
+                raise ValueError(f"missing value for '{column}'")
+        
+        # Handle both original format (with day) and saved format (without day)
+        date_str = row['Date'].split(' ')[0]  # Extract just the date part
+        
+        # Check if this is a saved file with Status column
+        if 'Status' in row:
+            # Load saved format with completion status and notes
+            return Session(
+                date_str,
+                row['Focus Topic'],
+                row.get('Suggested Tasks') or '',
+                row['Status'] == 'Complete',
+                row.get('Notes') or ''
+            )
+        
+        # Load original format
+        return Session(
+            date_str,
+            row['Focus Topic'],
+            row.get('Suggested Tasks') or ''
+        )
     
     @staticmethod
-    def categorize_dates(sessions):
-        """Categorize dates into Overdue, Today, Tomorrow, This Week, More than a week"""
-        today = datetime.date.today()
-        tomorrow = today + datetime.timedelta(days=1)
-        week_end = today + datetime.timedelta(days=7)
+    def iter_batches(file_path, first_batch=200, max_batch=50000, cancel_event=None):
+        """Parse the CSV incrementally, yielding (sessions, row_errors, progress) per batch
+        
+        Batch sizes double from first_batch up to max_batch, so the first screenful
+        arrives quickly while the total cost of merging batches stays O(n log n).
+        Rows that fail to parse are reported as (line number, message, row id,
+        raw bytes) instead of aborting the load, where row id is that of the
+        next parsed row; saves write the raw row back at that place (see
+        skipped_rows). A missing required column is still a fatal error.
+        Sessions are keyed by row id: the row's position among the parsed rows.
+        """
+        total_bytes = os.path.getsize(file_path)
+        if not total_bytes:
+            raise ValueError(f"Missing column(s): {', '.join(CSVLoader.REQUIRED_COLUMNS)}")
         
-        categories = {
-            'Overdue': [],
-            'Today': [],
-            'Tomorrow': [],
-            'This Week': [],
-            'More than a week': []
-        }
+        # Parse from a memory map so each row's byte range is known; long notes
+        # are left in the file and only a preview is kept (see lazy_notes.py)
+        source = NoteSource(file_path)
+        lines = OffsetLineReader(source.mmap)
+        reader = csv.DictReader(lines)
+        missing = [column for column in CSVLoader.REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(missing)}")
+        if 'Notes' in reader.fieldnames:
+            source.notes_column = reader.fieldnames.index('Notes')
         
-        for date_str, info in sessions.items():
+        batch = {}
+        errors = []
+        batch_size = first_batch
+        row_id = 0
+        row_start = lines.offset
+        for row in reader:
+            row_end = lines.offset
             try:
-                task_date = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-                
-                if task_date < today:
-                    categories['Overdue'].append((date_str, info))
-                elif task_date == today:
-                    categories['Today'].append((date_str, info))
-                elif task_date == tomorrow:
-                    categories['Tomorrow'].append((date_str, info))
-                elif task_date <= week_end:
-                    categories['This Week'].append((date_str, info))
-                else:
-                    categories['More than a week'].append((date_str, info))
-                    
-            except ValueError:
-                # Skip invalid dates
-                continue
+                session = CSVLoader.parse_row(row)
+                if source.notes_column is not None and len(session.notes) > LazyNote.THRESHOLD:
+                    notes = session.notes
+                    session = session.replace(notes=LazyNote(source, row_start, row_end, notes,
+                                                             LazyNote.text_digest(notes)))
+                batch[str(row_id)] = session
+                row_id += 1
+            except Exception as e:
+                errors.append((reader.line_num, str(e) or type(e).__name__, row_id, source.mmap[row_start:row_end]))
+            row_start = row_end
+            
+            if len(batch) + len(errors) >= batch_size:
+                yield batch, errors, lines.offset / total_bytes
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                batch = {}
+                errors = []
+                batch_size = min(batch_size * 2, max_batch)
+        
+        yield batch, errors, 1.0
+    
+    @staticmethod
+    def skipped_rows(errors):
+        """(row id, raw bytes) of the rows behind row errors, for CSVWriter to write back"""
+        return [(row_id, raw) for line, message, row_id, raw in errors if raw is not None]
+    
+    @staticmethod
+    def format_row_errors(errors, limit=10, kept=True):
+        """Summarize per-row parse errors for a message box
+        
+        kept says whether saves keep the rows in the file (they do for CSV
+        files, not for an import into a database).
+        """
+        lines = [f"Line {line}: {message}" for line, message, row_id, raw in errors[:limit]]
+        if len(errors) > limit:
+            lines.append(f"... and {len(errors) - limit} more")
+        if kept:
+            summary = f"{len(errors)} row(s) could not be loaded. They are not shown, and saving keeps them in the file unchanged:"
+        else:
+            summary = f"{len(errors)} row(s) could not be loaded and were skipped:"
+        return summary + "\n\n" + "\n".join(lines)
+    
+    # Display order of the date categories
+    CATEGORIES = SessionStore.CATEGORIES
+    
+    @staticmethod
+    def categorize_date(task_date, today=None):
+        """Return the category name for a parsed date, or None if the date was invalid"""
+        if task_date is None:
+            return None
+        if today is None:
+            today = datetime.date.today()
+        
+        if task_date < today:
+            return 'Overdue'
+        elif task_date == today:
+            return 'Today'
+        elif task_date == today + datetime.timedelta(days=1):
+            return 'Tomorrow'
+        elif task_date <= today + datetime.timedelta(days=7):
+            return 'This Week'
+        else:
+            return 'More than a week'
+    
+    @staticmethod
+    def categorize_dates(sessions, today=None):
+        """Categorize dates into Overdue, Today, Tomorrow, This Week, More than a week
+        
+        Returns {category: tuple of row ids in date order}. The store answers
+        from its sorted date index and memoizes the result per (today, version).
+        """
+        if today is None:
+            today = datetime.date.today()
         
-        return categories 
\ No newline at end of file
+        with tracer.span("categorize_dates", rows=len(sessions)):
+            return sessions.categorize(today) 
\ No newline at end of file
@@ -0,0 +1,163 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+
+class CSVWriter:
+    # Column order of saved schedules
+    HEADER = ['Date', 'Focus Topic', 'Suggested Tasks', 'Status', 'Notes']
+    # Number of <file>.backup generations kept by default
+    BACKUP_GENERATIONS = 3
+    
+    @staticmethod
+    def save_schedule(file_path, sessions, backups=BACKUP_GENERATIONS, move=None, skipped_rows=()):
+        """Atomically replace file_path with the schedule, rotating backups first
+        
+        The rows go to a temp file in the same directory which is fsync'd and
+        then moved over the original with os.replace, so a crash leaves either
+        the old or the new file, never a torn one. move(temp_path, offsets) does
+        the move instead of os.replace when given, with the byte range of every
+        row (see LazyNote.replace_file).
+        skipped_rows are (row id, raw bytes) of rows that could not be
+        loaded; they are written back unchanged (see write_rows).
+        Returns the number of bytes written.
+        """
+        directory = os.path.dirname(os.path.abspath(file_path))
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(file_path) + ".", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                offsets = CSVWriter.write_rows(f, sessions, skipped_rows)
+                size = f.tell()
+                f.flush()
+                os.fsync(f.fileno())
+            
+            # mkstemp creates private files; keep the original's permissions
+            if os.path.exists(file_path):
+                shutil.copymode(file_path, temp_path)
+            
+            CSVWriter.rotate_backups(file_path, backups)
+            if move is not None:
+                move(temp_path, offsets)
+            else:
+                os.replace(temp_path, file_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        CSVWriter._fsync_directory(directory)
+        return size
+    
+    @staticmethod
+    def write_rows(f, sessions, skipped_rows=()):
+        """Serialize the schedule to an open binary file as UTF-8
+        
+        Each skipped row's raw bytes go just before the session with its row
+        id (or at the end), where they were in the loaded file, so rows the
+        loader couldn't parse are never lost by a save. Returns {row id:
+        (start, end)} byte offsets of each row, so lazy notes can be pointed
+        at the new file.
+        """
+        line = io.StringIO()
+        writer = csv.writer(line)
+        offsets = {}
+        
+        def write(row):
+            line.seek(0)
+            line.truncate()
+            writer.writerow(row)
+            data = line.getvalue().encode('utf-8')
+            f.write(data)
+            return len(data)
+        
+        def write_raw(raw):
+            if not raw.endswith(b"\n"):
+                # The last line of the file may have had no line break
+                raw += b"\r\n"
+            f.write(raw)
+            return len(raw)
+        
+        skipped = sorted(skipped_rows, key=lambda row: row[0])
+        next_skipped = 0
+        position = write(CSVWriter.HEADER)
+        # Keep the file's row order: row ids are reassigned from it on the next load,
+        # so journaled edits made after this save still find their rows
+        for key, info in sorted(sessions.items(), key=lambda x: int(x[0])):
+            while next_skipped < len(skipped) and skipped[next_skipped][0] <= int(key):
+                position += write_raw(skipped[next_skipped][1])
+                next_skipped += 1
+            end = position + write([info.date_str, info.topic, info.suggested_tasks, info.status, info.notes])
+            offsets[key] = (position, end)
+            position = end
+        for row_id, raw in skipped[next_skipped:]:
+            position += write_raw(raw)
+        return offsets
+    
+    @staticmethod
+    def backup_path(file_path, generation):
+        """<file>.backup for the newest generation, <file>.backup.N for older ones"""
+        if generation == 0:
+            return file_path + ".backup"
+        return f"{file_path}.backup.{generation}"
+    
+    @staticmethod
+    def rotate_backups(file_path, generations):
+        """Shift existing backups down one generation and snapshot the current file"""
+        if generations <= 0 or not os.path.exists(file_path):
+            return
+        
+        for generation in range(generations - 1, 0, -1):
+            older = CSVWriter.backup_path(file_path, generation - 1)
+            if os.path.exists(older):
+                os.replace(older, CSVWriter.backup_path(file_path, generation))
+        
+        newest = CSVWriter.backup_path(file_path, 0)
+        if os.path.exists(newest):
+            os.remove(newest)
+        CSVWriter.snapshot(file_path, newest)
+    
+    @staticmethod
+    def snapshot(source, destination):
+        """Make destination hold source's current contents without reading it into Python
+        
+        A hard link costs nothing and stays valid because the save replaces the
+        original with a new file instead of rewriting it in place. Where links
+        are not supported the copy is done by the kernel.
+        """
+        try:
+            os.link(source, destination)
+        except (OSError, AttributeError):
+            CSVWriter.copy_file(source, destination)
+    
+    @staticmethod
+    def copy_file(source, destination):
+        """Kernel-side copy via copy_file_range, falling back to shutil (sendfile where available)"""
+        if hasattr(os, 'copy_file_range'):
+            try:
+                with open(source, 'rb') as src, open(destination, 'wb') as dst:
+                    remaining = os.fstat(src.fileno()).st_size
+                    while remaining > 0:
+                        copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                        if copied == 0:
+                            break
+                        remaining -= copied
+                    if remaining == 0:
+                        return
+            except OSError:
+                pass
+        shutil.copyfile(source, destination)
+    
+    @staticmethod
+    def _fsync_directory(directory):
+        """Persist the rename itself; not possible (or needed) on every platform"""
+        try:
+            fd = os.open(directory, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,94 @@
+class EditHistory:
+    """Unlimited undo and redo of changes to the store
+    
+    Each step keeps the store's PersistentMap from before and after one
+    change, plus the row ids it touched. Consecutive versions share every
+    node the change didn't touch, so a step costs memory in proportion to
+    the rows it changed rather than to the size of the schedule. A bulk
+    action is one store change and so one step.
+    
+    Undo and redo put the recorded sessions back as a new store change, so
+    they are journaled, autosaved and redrawn like any other edit. Restored
+    sessions are the original objects, which lets an external merge still
+    recognize a row whose edit was undone as untouched.
+    """
+    
+    def __init__(self, on_change=None):
+        self.on_change = on_change  # called when can_undo or can_redo may have changed
+        self.sessions = None
+        self._undo = []  # (row ids, sessions before, sessions after) per step
+        self._redo = []
+        self._current = None  # the store's sessions as of the last notification
+        self._restoring = False
+    
+    def attach(self, sessions):
+        """Record every subsequent change to the store as an undoable step"""
+        self.sessions = sessions
+        self._current = sessions.snapshot().sessions
+        sessions.add_listener(self._on_store_change)
+    
+    def _on_store_change(self, keys):
+        before, self._current = self._current, self.sessions.snapshot().sessions
+        if self._restoring:
+            return
+        self._undo.append((tuple(keys), before, self._current))
+        self._redo.clear()
+        self._notify()
+    
+    def _notify(self):
+        if self.on_change is not None:
+            self.on_change()
+    
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+    
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+    
+    def clear(self):
+        """Forget every step, e.g. once changes made by another program are merged in"""
+        self._undo.clear()
+        self._redo.clear()
+        self._notify()
+    
+    def undo(self):
+        """Revert the latest step; returns the row ids it touched (empty if there was none)"""
+        if not self._undo:
+            return ()
+        step = self._undo.pop()
+        keys, before, after = step
+        self._restore(keys, before)
+        self._redo.append(step)
+        self._notify()
+        return keys
+    
+    def redo(self):
+        """Apply the latest undone step again; returns the row ids it touched"""
+        if not self._redo:
+            return ()
+        step = self._redo.pop()
+        keys, before, after = step
+        self._restore(keys, after)
+        self._undo.append(step)
+        self._notify()
+        return keys
+    
+    def _restore(self, keys, version):
+        """Make the given rows of the store match an earlier (or later) version"""
+        current = self._current
+        changed = {}
+        removed = []
+        for key in dict.fromkeys(keys):
+            info = version.get(key)
+            if info is not None:
+                if current.get(key) is not info:
+                    changed[key] = info
+            elif key in current:
+                removed.append(key)
+        self._restoring = True
+        try:
+            self.sessions.apply_changes(changed, removed)
+        finally:
+            self._restoring = False
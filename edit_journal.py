@@ -0,0 +1,117 @@
+import json
+import os
+import threading
+from session import Session
+
+class EditJournal:
+    """Append-only JSONL log of edits kept next to the schedule file
+    
+    Every change is appended and fsync'd, so recording one edit costs the same
+    no matter how big the schedule is. Saving the CSV compacts the journal by
+    dropping the entries it now contains; opening a file replays what is left.
+    """
+    
+    SUFFIX = ".journal"
+    # Compact into the CSV once the journal grows past this many bytes
+    COMPACT_THRESHOLD = 1024 * 1024
+    
+    def __init__(self, file_path, on_threshold=None, base=0):
+        self.path = file_path + self.SUFFIX
+        self.on_threshold = on_threshold
+        # Store row ids are base + the row's id within this file (see workspace.py)
+        self.base = base
+        self._lock = threading.Lock()
+        self._file = None
+    
+    def attach(self, sessions):
+        """Journal every subsequent change made to the store"""
+        sessions.add_listener(lambda keys: self.record(sessions, keys))
+    
+    def record(self, sessions, keys):
+        """Append the current state of the changed sessions and fsync"""
+        lines = []
+        for key in keys:
+            entry = {'v': sessions.version, 'id': str(int(key) - self.base) if self.base else key}
+            info = sessions.get(key)
+            if info is None:
+                entry['deleted'] = True
+            else:
+                entry.update(date=info.date_str, topic=info.topic, suggested_tasks=info.suggested_tasks,
+                             completed=info.completed, notes=info.notes)
+            lines.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            size = self._file.tell()
+        
+        if self.on_threshold is not None and size > self.COMPACT_THRESHOLD:
+            self.on_threshold()
+    
+    def replay_into(self, sessions):
+        """Apply pending journal entries to a freshly loaded store; returns the number applied"""
+        entries = self.read()
+        if not entries:
+            return 0
+        
+        for entry in entries:
+            key = self.entry_key(sessions, entry)
+            if key is None:
+                continue
+            if entry.get('deleted'):
+                if key in sessions:
+                    del sessions[key]
+            else:
+                sessions[key] = Session(entry['date'], entry['topic'], entry['suggested_tasks'],
+                                        entry['completed'], entry['notes'])
+        # Keep numbering after the replayed entries so compaction can tell them apart
+        sessions.advance_version(max(entry.get('v', 0) for entry in entries))
+        return len(entries)
+    
+    def entry_key(self, sessions, entry):
+        """Row id an entry applies to; journals written before row ids were keyed by date"""
+        if 'id' in entry:
+            return str(int(entry['id']) + self.base) if self.base else entry['id']
+        keys = sessions.keys_for_date(entry['date'])
+        return keys[0] if keys else None
+    
+    def read(self):
+        """Read all complete entries, ignoring a torn last line left by a crash"""
+        entries = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return entries
+    
+    def compact(self, saved_version):
+        """Drop entries up to saved_version now that the CSV contains them"""
+        with self._lock:
+            self.close()
+            remaining = [entry for entry in self.read() if entry.get('v', 0) > saved_version]
+            if not remaining:
+                if os.path.exists(self.path):
+                    os.remove(self.path)
+                return
+            
+            # Entries made while the CSV was being written stay journaled
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
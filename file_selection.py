@@ -4,9 +4,10 @@ import json
 import os
 
 class FileSelectionFrame(tk.Frame):
-    def __init__(self, parent, on_file_selected):
+    def __init__(self, parent, on_file_selected, on_import_csv=None):
         super().__init__(parent)
         self.on_file_selected = on_file_selected
+        self.on_import_csv = on_import_csv  # on_import_csv(csv_path, db_path)
         self.setup_ui()
         self.load_last_file()
     
@@ -19,7 +20,7 @@ class FileSelectionFrame(tk.Frame):
         file_frame = tk.Frame(self)
         file_frame.pack(pady=20)
         
-        tk.Label(file_frame, text="Select CSV File:").pack()
+        tk.Label(file_frame, text="Select CSV File, Database or Folder:").pack()
         
         # File path display
         self.file_path_var = tk.StringVar()
@@ -32,22 +33,56 @@ class FileSelectionFrame(tk.Frame):
         btn_frame.pack(pady=10)
         
         tk.Button(btn_frame, text="Browse Files", command=self.browse_file).pack(side="left", padx=5)
+        tk.Button(btn_frame, text="Open Folder", command=self.browse_folder).pack(side="left", padx=5)
         tk.Button(btn_frame, text="Use Last File", command=self.use_last_file).pack(side="left", padx=5)
+        if self.on_import_csv is not None:
+            tk.Button(btn_frame, text="Import CSV to Database", command=self.import_csv).pack(side="left", padx=5)
         
         # Load button
         self.load_btn = tk.Button(file_frame, text="Load Schedule", command=self.load_file, 
                                  state="disabled", bg="green", fg="white")
         self.load_btn.pack(pady=10)
+        
+        self.status_var = tk.StringVar()
+        tk.Label(file_frame, textvariable=self.status_var).pack()
     
     def browse_file(self):
         file_path = filedialog.askopenfilename(
             title="Select CSV File",
-            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+            filetypes=[("CSV files", "*.csv"), ("SQLite databases", "*.db *.sqlite *.sqlite3"), ("All files", "*.*")]
         )
         if file_path:
             self.file_path_var.set(file_path)
             self.load_btn.config(state="normal")
     
+    def browse_folder(self):
+        """Pick a folder to open every CSV schedule in it as one workspace"""
+        folder = filedialog.askdirectory(title="Select Folder of CSV Files")
+        if folder:
+            self.file_path_var.set(folder)
+            self.load_btn.config(state="normal")
+    
+    def import_csv(self):
+        """Pick a CSV schedule and a database to convert it into"""
+        csv_path = filedialog.askopenfilename(
+            title="Select CSV File to Import",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not csv_path:
+            return
+        db_path = filedialog.asksaveasfilename(
+            title="Save Database As",
+            initialfile=os.path.splitext(os.path.basename(csv_path))[0] + ".db",
+            defaultextension=".db",
+            filetypes=[("SQLite databases", "*.db *.sqlite *.sqlite3"), ("All files", "*.*")]
+        )
+        if db_path:
+            self.save_last_file(db_path)
+            self.on_import_csv(csv_path, db_path)
+    
+    def show_status(self, text):
+        self.status_var.set(text)
+    
     def use_last_file(self):
         last_file = self.get_last_file()
         if last_file and os.path.exists(last_file):
@@ -62,7 +97,7 @@ class FileSelectionFrame(tk.Frame):
             self.save_last_file(file_path)
             self.on_file_selected(file_path)
         else:
-            messagebox.showerror("Error", "Please select a valid CSV file.")
+            messagebox.showerror("Error", "Please select a valid CSV file, database or folder.")
     
     def load_last_file(self):
         last_file = self.get_last_file()
@@ -0,0 +1,293 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+import tkinter as tk
+from lazy_notes import LazyNote
+from session import Session
+
+class Inotify:
+    """Minimal Linux inotify binding (through ctypes) watching one directory"""
+    
+    IN_MODIFY = 0x002
+    IN_ATTRIB = 0x004
+    IN_CLOSE_WRITE = 0x008
+    IN_MOVED_TO = 0x080
+    IN_CREATE = 0x100
+    EVENT = struct.Struct("iIII")  # wd, mask, cookie, length of the name that follows
+    
+    def __init__(self, directory):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        # Watch the directory, not the file: atomic saves replace the file's inode
+        mask = self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(error, f"inotify_add_watch failed for {directory}")
+    
+    def read_names(self):
+        """Names of the files with pending events (empty when there are none)"""
+        names = set()
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return names
+            offset = 0
+            while offset < len(data):
+                wd, mask, cookie, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size
+                names.add(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+                offset += length
+    
+    def close(self):
+        os.close(self.fd)
+
+class FileWatcher:
+    """Calls on_change on the Tk thread when the watched file is modified
+    
+    Uses inotify where available, through a Tk file handler so no thread is
+    needed; elsewhere the file's size and mtime are polled with after().
+    Bursts of events from one write are coalesced by waiting SETTLE_DELAY ms
+    for them to stop. Changes made by this app are reported too: on_change
+    decides whether the file differs from what was last loaded or saved.
+    """
+    
+    POLL_INTERVAL = 1000
+    SETTLE_DELAY = 250
+    
+    def __init__(self, root, file_path, on_change):
+        self.root = root
+        self.file_path = file_path
+        self.on_change = on_change
+        self._settle_after = None
+        self._poll_after = None
+        self._inotify = None
+        try:
+            self._inotify = Inotify(os.path.dirname(os.path.abspath(file_path)))
+            root.tk.createfilehandler(self._inotify.fd, tk.READABLE, self._on_events)
+        except (OSError, AttributeError, TypeError, tk.TclError):
+            # Not Linux, or a Tk without file handlers (Windows): fall back to polling
+            if self._inotify is not None:
+                self._inotify.close()
+                self._inotify = None
+            self._last_key = self._stat()
+            self._poll_after = root.after(self.POLL_INTERVAL, self._poll)
+    
+    def _stat(self):
+        try:
+            stat = os.stat(self.file_path)
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns
+    
+    def _on_events(self, fd, mask):
+        if os.path.basename(self.file_path) in self._inotify.read_names():
+            self._settle()
+    
+    def _poll(self):
+        key = self._stat()
+        if key != self._last_key:
+            self._last_key = key
+            self._settle()
+        self._poll_after = self.root.after(self.POLL_INTERVAL, self._poll)
+    
+    def _settle(self):
+        if self._settle_after is not None:
+            self.root.after_cancel(self._settle_after)
+        self._settle_after = self.root.after(self.SETTLE_DELAY, self._fire)
+    
+    def _fire(self):
+        self._settle_after = None
+        self.on_change()
+    
+    def stop(self):
+        for after_id in (self._settle_after, self._poll_after):
+            if after_id is not None:
+                self.root.after_cancel(after_id)
+        self._settle_after = self._poll_after = None
+        if self._inotify is not None:
+            self.root.tk.deletefilehandler(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+
+class ScheduleMerge:
+    """Three-way merge of an externally changed file into the store
+    
+    base is the file as last loaded or saved, local the store and external
+    the file as it is now; all map row id -> Session. Rows are matched by
+    (date, topic, occurrence of that pair) rather than by row id, because
+    row ids shift when rows are inserted or removed in the file. Untouched
+    sessions are the very objects in base, so a local edit is detected by
+    identity without comparing any text. Lazy notes are compared by the
+    digest taken when they were parsed, so base notes still compare after
+    the file they were loaded from is rewritten in place.
+    """
+    
+    # Fields a user can edit in this app
+    EDITABLE = ('completed', 'notes')
+    # Value of a lazy note without a digest whose file was rewritten in place
+    UNREADABLE = object()
+    
+    @staticmethod
+    def identities(sessions):
+        """{(date, topic, occurrence): row id} in file order"""
+        counts = {}
+        identities = {}
+        for key in sorted(sessions, key=int):
+            info = sessions[key]
+            pair = (info.date_str, info.topic)
+            occurrence = counts.get(pair, 0)
+            counts[pair] = occurrence + 1
+            identities[pair + (occurrence,)] = key
+        return identities
+    
+    @staticmethod
+    def notes_key(info):
+        """A value equal for sessions with equal notes, without reading lazy notes that have a digest
+        
+        Short notes are their own key; longer ones, which may be lazy, are keyed by digest.
+        """
+        note = info.lazy_note
+        if note is not None and note.digest is not None:
+            return note.digest
+        notes = info.notes
+        return notes if len(notes) <= LazyNote.THRESHOLD else LazyNote.text_digest(notes)
+    
+    @staticmethod
+    def same(a, b):
+        """True if two sessions hold the same values"""
+        if a is b:
+            return True
+        if (a.date_str, a.topic, a.suggested_tasks, a.completed) != (b.date_str, b.topic, b.suggested_tasks, b.completed):
+            return False
+        if a.lazy_note is not None and a.lazy_note is b.lazy_note:
+            return True
+        try:
+            return ScheduleMerge.notes_key(a) == ScheduleMerge.notes_key(b)
+        except OSError:
+            # A note without a digest whose file was overwritten in place can't be trusted
+            return False
+    
+    @staticmethod
+    def value(info, field):
+        """What a field is compared by: notes_key() for notes, UNREADABLE if that fails"""
+        if field != 'notes':
+            return getattr(info, field)
+        try:
+            return ScheduleMerge.notes_key(info)
+        except OSError:
+            return ScheduleMerge.UNREADABLE
+    
+    @staticmethod
+    def merge_fields(base, local, external):
+        """Combine edits to one row field by field; returns (session, conflicting fields)
+        
+        Where both sides changed a field differently the local value is kept.
+        """
+        def field_of(info, field):
+            # Lazy notes are passed on as they are rather than read
+            if field == 'notes' and info.lazy_note is not None:
+                return info.lazy_note
+            return getattr(info, field)
+        
+        values = {'suggested_tasks': external.suggested_tasks}
+        conflicts = []
+        for field in ScheduleMerge.EDITABLE:
+            base_value, local_value, external_value = (ScheduleMerge.value(info, field)
+                                                       for info in (base, local, external))
+            if local_value is ScheduleMerge.UNREADABLE or local_value == base_value:
+                values[field] = field_of(external, field)
+            else:
+                values[field] = field_of(local, field)
+                if external_value != base_value and external_value != local_value:
+                    conflicts.append(field)
+        return Session(external.date_str, external.topic, values['suggested_tasks'],
+                       values['completed'], values['notes']), conflicts
+    
+    @staticmethod
+    def merge(base, local, external):
+        """Return (merged, local_keys, conflicts, ids)
+        
+        merged maps the external file's row ids (plus new ids for rows only
+        kept locally) to sessions; local_keys are the ids where merged differs
+        from the file; conflicts are (session, message) pairs to show the user;
+        ids maps each local row id that is still in merged to its id there.
+        """
+        same = ScheduleMerge.same
+        base_ids = ScheduleMerge.identities(base)
+        merged = {}
+        local_keys = set()
+        conflicts = []
+        matched = set()
+        ids = {}
+        
+        for identity, key in ScheduleMerge.identities(external).items():
+            theirs = external[key]
+            base_key = base_ids.get(identity)
+            if base_key is None:
+                # Added by the other program
+                merged[key] = theirs
+                continue
+            matched.add(base_key)
+            original = base[base_key]
+            ours = local.get(base_key)
+            if ours is not None:
+                ids[base_key] = key
+            
+            if ours is original:
+                # Not edited here: keep the loaded object when nothing changed so the row isn't redrawn
+                merged[key] = original if same(original, theirs) else theirs
+            elif ours is None:
+                if same(original, theirs):
+                    local_keys.add(key)
+                else:
+                    merged[key] = theirs
+                    conflicts.append((theirs, "deleted here but changed in the file; the file's version was kept"))
+            elif same(original, theirs) or same(ours, theirs):
+                merged[key] = ours
+                if not same(ours, theirs):
+                    local_keys.add(key)
+            else:
+                merged[key], fields = ScheduleMerge.merge_fields(original, ours, theirs)
+                local_keys.add(key)
+                if fields:
+                    conflicts.append((ours, f"{' and '.join(fields)} changed here and in the file; your version was kept"))
+        
+        # Rows that only exist here get ids after the file's rows
+        next_key = max((int(key) for key in external), default=-1) + 1
+        unmatched = [key for key in base_ids.values() if key not in matched]
+        unmatched += sorted((key for key in local if key not in base), key=int)
+        for key in unmatched:
+            ours = local.get(key)
+            if ours is None or ours is base.get(key):
+                # Removed from the file and not edited here
+                continue
+            merged[str(next_key)] = ours
+            local_keys.add(str(next_key))
+            ids[key] = str(next_key)
+            next_key += 1
+            if key in base:
+                conflicts.append((ours, "removed from the file but edited here; your version was kept"))
+        return merged, local_keys, conflicts, ids
+    
+    @staticmethod
+    def remap_keys(keys, ids, old_keys):
+        """Carry a set of row ids over to the merged ids
+        
+        Row ids in ids are renamed, other ids from old_keys are dropped as
+        their rows are gone, and anything else (e.g. header iids) is kept.
+        """
+        return {ids[key] if key in ids else key for key in keys if key in ids or key not in old_keys}
+    
+    @staticmethod
+    def format_conflicts(conflicts, limit=10):
+        """Summarize merge conflicts for a message box"""
+        lines = [f"[{info.date_str}] {info.topic}: {message}" for info, message in conflicts[:limit]]
+        if len(conflicts) > limit:
+            lines.append(f"... and {len(conflicts) - limit} more")
+        return (f"The file was changed by another program. {len(conflicts)} task(s) were also "
+                "edited here:\n\n" + "\n".join(lines))
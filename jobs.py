@@ -0,0 +1,130 @@
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class Job:
+    """A unit of background work that can report progress and be cancelled"""
+    
+    def __init__(self, runner, name, cancellable=True):
+        self.runner = runner
+        self.name = name
+        self.cancellable = cancellable
+        self.cancel_event = threading.Event()
+        self.progress = None
+        self.message = name
+        self.finished = False
+    
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+    
+    def cancel(self):
+        """Ask the job to stop; the work function checks cancelled between steps"""
+        if self.cancellable:
+            self.cancel_event.set()
+    
+    def report(self, fraction, message=None):
+        """Worker thread: update progress shown in the status bar"""
+        self.runner._post(self, self._set_progress, fraction, message)
+    
+    def post(self, callback, *args):
+        """Worker thread: run callback(*args) on the Tk thread"""
+        self.runner._post(self, callback, *args)
+    
+    def _set_progress(self, fraction, message):
+        self.progress = fraction
+        if message is not None:
+            self.message = message
+        self.runner._notify()
+
+class JobRunner:
+    """Thread pool whose callbacks are delivered on the Tk thread via after()
+    
+    Work functions run on a worker and receive their Job, which they use to
+    report progress, post intermediate results and check for cancellation.
+    Nothing but the queue is touched from worker threads, so Tk is only ever
+    used from the main thread.
+    """
+    
+    POLL_MS = 50
+    
+    def __init__(self, root, max_workers=2, on_status=None):
+        self.root = root
+        self.on_status = on_status  # on_status(active jobs) whenever the set or progress changes
+        self.active = []
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._events = queue.Queue()
+        self._polling = False
+    
+    def submit(self, name, func, on_done=None, on_error=None, cancellable=True):
+        """Run func(job) in the pool; on_done(result) or on_error(exception) run on the Tk thread
+        
+        Neither callback runs if the job was cancelled.
+        """
+        job = Job(self, name, cancellable)
+        self.active.append(job)
+        
+        def run():
+            try:
+                result = func(job)
+            except Exception as e:
+                self._events.put((job, self._finish, (job, on_error, e)))
+            else:
+                self._events.put((job, self._finish, (job, on_done, result)))
+        
+        self._executor.submit(run)
+        self._notify()
+        self._start_polling()
+        return job
+    
+    def cancel_all(self):
+        for job in self.active:
+            job.cancel()
+    
+    def shutdown(self):
+        """Cancel what can be cancelled and wait for the rest (e.g. saves) to finish"""
+        self.cancel_all()
+        self._executor.shutdown(wait=True)
+    
+    def _post(self, job, callback, *args):
+        self._events.put((job, callback, args))
+    
+    def _finish(self, job, callback, value):
+        job.finished = True
+        if job in self.active:
+            self.active.remove(job)
+        self._notify()
+        # A cancelled job's outcome is of no interest to whoever cancelled it
+        if callback is not None and not job.cancelled:
+            callback(value)
+    
+    def _notify(self):
+        if self.on_status is not None:
+            self.on_status(list(self.active))
+    
+    def _start_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+    
+    def _poll(self):
+        """Tk thread: run queued callbacks, then keep polling while jobs are active"""
+        while True:
+            try:
+                job, callback, args = self._events.get_nowait()
+            except queue.Empty:
+                break
+            # Intermediate results of a cancelled job are dropped; its completion still clears it
+            if job.cancelled and callback != self._finish:
+                continue
+            try:
+                callback(*args)
+            except Exception:
+                # Report like any other Tk callback error, but keep polling
+                self.root.report_callback_exception(*sys.exc_info())
+        
+        if self.active:
+            self.root.after(self.POLL_MS, self._poll)
+        else:
+            self._polling = False
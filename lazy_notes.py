@@ -0,0 +1,297 @@
+import csv
+import hashlib
+import io
+import mmap
+import os
+import sqlite3
+import sys
+import threading
+import weakref
+
+class NoteSource:
+    """Read-only memory map of a CSV file that lazy notes are read from
+    
+    Every open source is listed in live and knows the notes that read from
+    it, so a save can find all of them before replacing the file (see
+    LazyNote.replace_file).
+    """
+    
+    live = weakref.WeakSet()
+    
+    def __init__(self, file_path, notes_column=None):
+        self.file_path = file_path
+        self.notes_column = notes_column  # index of the Notes field within a row
+        self.notes = weakref.WeakSet()  # LazyNotes located in this file
+        self.closed = False
+        self._open()
+        self.stamp = self._stamp()
+        NoteSource.live.add(self)
+    
+    def _open(self):
+        # Kept open so an in-place rewrite of this very file can be told from a
+        # replacement of the path, which leaves the mapped contents intact
+        self._file = open(self.file_path, 'rb')
+        self.mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        stat = os.fstat(self._file.fileno())
+        self.identity = stat.st_dev, stat.st_ino
+    
+    def _stamp(self):
+        stat = os.fstat(self._file.fileno())
+        return stat.st_size, stat.st_mtime_ns
+    
+    def _check(self):
+        if self.closed:
+            raise OSError(f"{self.file_path} is no longer open")
+        # Offsets into a file rewritten under the mapping point at other rows,
+        # or past its end, which would crash
+        if self._stamp() != self.stamp:
+            raise OSError(f"{self.file_path} changed since it was loaded")
+    
+    def maps(self, file_path):
+        """Whether this is a mapping of whatever file is at file_path"""
+        return os.path.normcase(os.path.abspath(self.file_path)) == os.path.normcase(os.path.abspath(file_path))
+    
+    def close(self):
+        """Unmap the file; notes still located here can't be read until reopen()"""
+        self.closed = True
+        self.mmap.close()
+        self._file.close()
+    
+    def reopen(self):
+        """Map the file again after close(), if the very same file is still at the path"""
+        identity = self.identity
+        try:
+            self._open()
+        except (OSError, ValueError):
+            return
+        if self.identity == identity and self._stamp() == self.stamp:
+            self.closed = False
+        else:
+            self.mmap.close()
+            self._file.close()
+            self.identity = identity
+    
+    def read_bytes(self, start, end):
+        self._check()
+        return self.mmap[start:end]
+    
+    def find(self, data, start, end):
+        """Offset of the first occurrence of data within [start, end), or -1"""
+        self._check()
+        return self.mmap.find(data, start, end)
+    
+    def read_field(self, start, end):
+        """Re-parse the row stored at [start, end) and return its Notes field"""
+        text = self.read_bytes(start, end).decode('utf-8').replace('\r\n', '\n')
+        for row in csv.reader(io.StringIO(text, newline='')):
+            if row:
+                return row[self.notes_column]
+        return ''
+    
+    def copy(self, start, end):
+        """An in-memory copy of the row at [start, end), as a (source, start, end) location"""
+        data = self.read_bytes(start, end)
+        return RowCopy(self.file_path, self.notes_column, data), 0, len(data)
+
+class RowCopy(NoteSource):
+    """One row copied into memory from a file that a save is replacing
+    
+    Holds the notes that the new file doesn't have, such as the earlier
+    version of an edited row that undo can still bring back.
+    """
+    
+    def __init__(self, file_path, notes_column, data):
+        self.file_path = file_path
+        self.notes_column = notes_column
+        self.notes = weakref.WeakSet()
+        self.closed = False
+        self.mmap = data
+    
+    def _check(self):
+        pass
+    
+    def maps(self, file_path):
+        return False
+
+class NoteCopy(RowCopy):
+    """A note's text copied into memory from a database row that is about to change"""
+    
+    def __init__(self, file_path, text):
+        super().__init__(file_path, None, text.encode('utf-8'))
+    
+    def read_field(self, start, end):
+        return self.read_bytes(start, end).decode('utf-8')
+
+class SQLiteNoteSource:
+    """Long notes left in a SQLite database, read by row id when needed
+    
+    A lazy note located here is (source, row id, None). The connection is
+    shared by every thread that reads notes, one query at a time; edits go
+    through the storage's own connection.
+    """
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.notes = weakref.WeakSet()
+        self.closed = False
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(file_path, check_same_thread=False)
+    
+    def maps(self, file_path):
+        # Not a file that CSV saves replace
+        return False
+    
+    def _query(self, sql, parameters):
+        with self._lock:
+            if self.closed:
+                raise OSError(f"{self.file_path} is no longer open")
+            return self._connection.execute(sql, parameters).fetchall()
+    
+    def read_field(self, row_id, end=None):
+        rows = self._query("SELECT notes FROM sessions WHERE id = ?", (row_id,))
+        if not rows:
+            raise OSError(f"Row {row_id} is no longer in {self.file_path}")
+        return rows[0][0]
+    
+    def read_bytes(self, row_id, end=None):
+        return self.read_field(row_id).encode('utf-8')
+    
+    def copy(self, row_id, end=None):
+        copy = NoteCopy(self.file_path, self.read_field(row_id))
+        return copy, 0, len(copy.mmap)
+    
+    def rows_containing(self, text, min_length=0):
+        """(row id, notes) of rows whose notes are longer than min_length and
+        contain text, with ASCII letters compared case-insensitively"""
+        return self._query("SELECT id, notes FROM sessions WHERE length(notes) > ? AND instr(lower(notes), ?) > 0",
+                           (min_length, text))
+    
+    def close(self):
+        with self._lock:
+            self.closed = True
+            self._connection.close()
+
+class LazyNote:
+    """A long note that stays in the file until it is needed
+    
+    Only a short preview is kept in memory; read() re-parses the row from the
+    memory-mapped file. location is replaced in one assignment when a save
+    moves the row, so readers on other threads see either the old file or
+    the new one, never a mix. A reader that finds its file closed waits for
+    the save to finish under moving and reads from the new location, and one
+    whose note was moved while it read (e.g. copied out of a database row
+    just before an edit overwrote it) reads again from where it went.
+    """
+    
+    __slots__ = ('location', 'preview', 'digest', '__weakref__')
+    
+    # Notes longer than this are left in the file
+    THRESHOLD = 120
+    # Characters of each lazy note kept resident for the task list
+    PREVIEW_CHARS = 60
+    # Held by a save while the files lazy notes are read from are closed and replaced
+    moving = threading.Lock()
+    
+    def __init__(self, source, start, end, note, digest=None):
+        self.location = (source, start, end)
+        self.preview = sys.intern(note[:self.PREVIEW_CHARS])
+        # text_digest() of the full note, if it was read when the note was created
+        self.digest = digest
+        source.notes.add(self)
+    
+    @staticmethod
+    def text_digest(text):
+        """Short hash of a note's text, to compare notes without reading them back"""
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    
+    def _read(self, read):
+        location = self.location
+        try:
+            text = read(*location)
+        except (OSError, ValueError):
+            if not location[0].closed:
+                raise
+            # A save closed the file under us; it has moved the note by the time it lets go
+            with LazyNote.moving:
+                location = self.location
+            return read(*location)
+        if self.location is not location:
+            return read(*self.location)
+        return text
+    
+    def read(self):
+        return self._read(lambda source, start, end: source.read_field(start, end))
+    
+    def _move(self, source, start, end):
+        self.location = (source, start, end)
+        source.notes.add(self)
+    
+    def detach(self):
+        """Copy the note's row into memory, so it no longer needs the file"""
+        source, start, end = self.location
+        self._move(*source.copy(start, end))
+    
+    @staticmethod
+    def replace_file(sessions, temp_path, file_path, notes_column, offsets):
+        """Move a newly written file over file_path, taking lazy notes along
+        
+        offsets maps row id to the (start, end) byte range written for it;
+        the notes of sessions are pointed at those rows of the new file. Any
+        other note still read from file_path, e.g. an edited row's previous
+        version kept for undo, has its row copied into memory. Every mapping
+        of the old file is closed before the move, as Windows can't replace a
+        mapped file; if the move fails they are opened again.
+        """
+        moved = {}
+        for key, info in sessions.items():
+            note = info.lazy_note
+            if note is not None:
+                moved[note] = offsets[key]
+        
+        with LazyNote.moving:
+            closed = []
+            for source in list(NoteSource.live):
+                if source.closed or not source.maps(file_path):
+                    continue
+                for note in list(source.notes):
+                    if note not in moved and note.location[0] is source:
+                        try:
+                            note.detach()
+                        except OSError:
+                            # The file changed under the note, which was unreadable already
+                            pass
+                source.close()
+                closed.append(source)
+            try:
+                os.replace(temp_path, file_path)
+            except BaseException:
+                for source in closed:
+                    source.reopen()
+                raise
+            
+            if moved:
+                source = NoteSource(file_path, notes_column)
+                for note, (start, end) in moved.items():
+                    note._move(source, start, end)
+
+class OffsetLineReader:
+    """Iterate the lines of a memory-mapped file for csv, tracking byte offsets
+    
+    The csv module pulls exactly the lines of one record at a time, so after
+    each row offset is where that row ends in the file.
+    """
+    
+    def __init__(self, mapped):
+        self.mmap = mapped
+        self.offset = 0
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        line = self.mmap.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        # Same newline handling as reading the file in text mode
+        return line.decode('utf-8').replace('\r\n', '\n')
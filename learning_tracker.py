@@ -0,0 +1,300 @@
+import os
+import tkinter as tk
+from tkinter import messagebox
+from file_selection import FileSelectionFrame
+from csv_loader import CSVLoader
+from edit_history import EditHistory
+from file_watcher import FileWatcher, ScheduleMerge
+from jobs import JobRunner
+from storage import open_storage, SQLiteStorage
+from session_store import SessionStore
+from search_index import SearchIndex
+from analytics import ColumnView
+from clipboard import Clipboard
+from schedule_cache import ScheduleCache
+from main_interface import MainInterface
+from perf import tracer
+from task_actions import TaskActions
+
+class LearningTracker(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Learning Schedule Tracker")
+        self.geometry("800x600")
+        
+        self.current_file = None
+        self.sessions = SessionStore()
+        self.load_job = None
+        self.load_span = None
+        self.load_errors = []
+        self.storage = None
+        self.watcher = None
+        self.merge_job = None
+        self.schedule_cache = ScheduleCache()
+        # Tk's own clipboard; chosen once rather than probed on every export
+        self.clipboard = Clipboard.resolve(self)
+        self.search_index = SearchIndex()
+        self.index_job = None
+        self.progress_view = ColumnView()
+        self.history = EditHistory()
+        
+        # Initialize components
+        self.csv_loader = CSVLoader()
+        self.main_interface = MainInterface(self)
+        self.task_actions = TaskActions(self)
+        # Blocking file I/O runs here so the window keeps responding
+        self.jobs = JobRunner(self, on_status=self.main_interface.update_status)
+        
+        # Flush pending autosave changes before the window goes away
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Start with file selection
+        self.show_file_selection()
+    
+    def show_file_selection(self):
+        """Show the file selection interface"""
+        self.stop_autosave()
+        self.cancel_loading()
+        self.close_storage()
+        
+        # Clear current widgets
+        for widget in self.winfo_children():
+            widget.destroy()
+        
+        # Show file selection frame
+        self.file_frame = FileSelectionFrame(self, self.load_schedule, self.import_csv)
+        self.file_frame.pack(expand=True, fill="both")
+    
+    def stop_autosave(self):
+        """Stop autosave, writing any pending changes to the current file"""
+        if self.task_actions.autosave_enabled:
+            self.task_actions.stop_autosave(show_message=False)
+    
+    def close_storage(self):
+        """Stop persisting edits to (and watching) the current file"""
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        if self.storage is not None:
+            self.storage.close()
+            self.storage = None
+    
+    def on_close(self):
+        """Flush autosave, let running saves finish and close the application"""
+        self.stop_autosave()
+        self.jobs.shutdown()
+        self.close_storage()
+        tracer.write()
+        self.destroy()
+    
+    @property
+    def is_loading(self):
+        """True while a schedule is still being parsed in the background"""
+        return self.load_job is not None and not self.load_job.finished
+    
+    def load_schedule(self, file_path):
+        """Load schedule from selected file, showing rows as they are parsed"""
+        self.current_file = file_path
+        self.load_span = tracer.span("load_schedule", file=os.path.basename(file_path))
+        self.storage = open_storage(file_path, self.schedule_cache)
+        self.sessions = SessionStore()
+        self.sessions.add_listener(self.task_actions.on_sessions_changed)
+        # Only built once something is searched for
+        self.search_index = SearchIndex(defer=self.after_idle)
+        self.search_index.attach(self.sessions)
+        self.index_job = None
+        # Columns for the stats panel, only built once it is opened
+        self.progress_view = ColumnView()
+        self.progress_view.attach(self.sessions)
+        # Attached once loaded: loading and journal replay are not undoable
+        self.history = EditHistory(on_change=self.main_interface.update_history_buttons)
+        self.load_errors = []
+        self.show_main_interface()
+        
+        storage = self.storage
+        
+        def load(job):
+            loaded = 0
+            with tracer.span("parse", storage=type(storage).__name__) as span:
+                for sessions, row_errors, progress in storage.iter_batches(cancel_event=job.cancel_event):
+                    loaded += len(sessions)
+                    job.post(self.on_load_batch, sessions, row_errors)
+                    job.report(progress, f"Loading... {loaded} tasks")
+                span.set(rows=loaded)
+        
+        job = self.load_job = self.jobs.submit("Loading...", load,
+                                               on_done=lambda result: self.on_load_done(job),
+                                               on_error=lambda error: self.on_load_error(job, error))
+    
+    def build_search_index(self):
+        """Index the store on a job thread; the view is filtered again once it is done"""
+        if self.index_job is not None and not self.index_job.finished:
+            return
+        index = self.search_index
+        snapshot = index.start_build()
+        
+        def on_done(built):
+            if built is not None and index is self.search_index:
+                index.install(built)
+                self.populate_tree()
+        
+        self.index_job = self.jobs.submit("Indexing...",
+                                          lambda job: SearchIndex.build(snapshot, job.cancel_event),
+                                          on_done=on_done,
+                                          on_error=lambda e: print(f"Search index error: {str(e)}"))
+    
+    def cancel_loading(self):
+        """Cancel a load in progress; the partial schedule is discarded"""
+        if self.is_loading:
+            self.load_job.cancel()
+            self.load_span.end(cancelled=True)
+            self.current_file = None
+            self.sessions = SessionStore()
+    
+    def cancel_jobs(self):
+        """Status bar Cancel: abandon a load, or stop running exports"""
+        if self.is_loading:
+            self.show_file_selection()
+        else:
+            self.jobs.cancel_all()
+    
+    def on_load_batch(self, sessions, row_errors):
+        """Merge a parsed batch into the store and refresh the view"""
+        self.sessions.add_many(sessions)
+        self.load_errors.extend(row_errors)
+        self.populate_tree()
+    
+    def on_load_done(self, job):
+        """Finish a background load"""
+        if job.cancelled or job is not self.load_job:
+            # Cancelling already switched back to file selection
+            return
+        
+        # Recover edits journaled since the last save, then persist new ones
+        if self.storage.attach(self.sessions, on_threshold=self.task_actions.compact_journal):
+            self.populate_tree()
+        self.history.attach(self.sessions)
+        if self.storage.watch_path is not None:
+            self.watcher = FileWatcher(self, self.storage.watch_path, self.check_external_changes)
+        if self.storage.needs_caching:
+            # Pickling a big schedule takes a while; do it after the rows are usable
+            storage = self.storage
+            self.jobs.submit("Caching schedule...", lambda job: storage.write_cache(),
+                             on_error=lambda e: print(f"Cache error: {str(e)}"), cancellable=False)
+        self.load_span.end(rows=len(self.sessions), row_errors=len(self.load_errors))
+        if self.load_errors:
+            messagebox.showwarning("Warning", self.csv_loader.format_row_errors(self.load_errors))
+    
+    def on_load_error(self, job, error):
+        """Abort a background load that could not read the file at all"""
+        if job.cancelled or job is not self.load_job:
+            return
+        self.load_span.end(error=type(error).__name__)
+        messagebox.showerror("Error", f"Failed to load CSV file: {str(error)}")
+        self.current_file = None
+        self.sessions = SessionStore()
+        self.show_file_selection()
+    
+    def check_external_changes(self):
+        """Merge the file into the store if another program has changed it"""
+        storage = self.storage
+        if storage is None or self.is_loading or (self.merge_job is not None and not self.merge_job.finished):
+            return
+        save_lock = self.task_actions.save_lock
+        if not save_lock.acquire(blocking=False):
+            # Our own save is replacing the file; look again once it is done
+            self.after(FileWatcher.SETTLE_DELAY, self.check_external_changes)
+            return
+        try:
+            # Under the lock, so a save can't move the base on between these reads
+            if not storage.changed_externally():
+                return
+            base = storage.base
+            local = self.sessions.snapshot()
+        finally:
+            save_lock.release()
+        
+        def merge(job):
+            file_key, external, row_errors = storage.read_external(job.cancel_event)
+            merged, local_keys, conflicts, ids = ScheduleMerge.merge(base, local, external)
+            # Rows merged from the file are the file's contents; the rest differ from it
+            new_base = {key: external[key] if key in local_keys or key not in merged else merged[key]
+                        for key in external}
+            return file_key, merged, local_keys, conflicts, ids, row_errors, new_base
+        
+        job = self.merge_job = self.jobs.submit(
+            "Merging external changes...", merge,
+            on_done=lambda result: self.on_external_merged(job, storage, local, result),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to merge external changes: {str(e)}"))
+    
+    def on_external_merged(self, job, storage, local, result):
+        """Apply a merged external change to the store and patch the changed rows"""
+        if job.cancelled or storage is not self.storage:
+            return
+        if self.sessions.snapshot() is not local:
+            # Edited while merging; merge again against the current store
+            self.merge_job = None
+            self.check_external_changes()
+            return
+        
+        file_key, merged, local_keys, conflicts, ids, row_errors, new_base = result
+        changed = {key: info for key, info in merged.items() if local.get(key) is not info}
+        removed = [key for key in local if key not in merged]
+        # Rows that moved to another date (or appeared) have to be re-sorted into their category
+        relayout = bool(removed) or any(local.get(key) is None or local[key].date != info.date
+                                        for key, info in changed.items())
+        if any(old != new for old, new in ids.items()) or len(ids) < len(local):
+            # Selected rows keep their selection under their new ids; removed ones lose it
+            remap = lambda keys: ScheduleMerge.remap_keys(keys, ids, local)
+            self.task_actions.selected_tasks = remap(self.task_actions.selected_tasks)
+            self.tree.set_selection(remap(self.tree.selection()))
+            relayout = True
+        if changed or removed:
+            self.sessions.apply_changes(changed, removed)
+            # Undoing past the merge would revert the other program's changes
+            self.history.clear()
+        storage.rebase(new_base, file_key, self.sessions, local_keys, row_errors)
+        if not local_keys:
+            # The store now matches the file exactly
+            self.sessions.mark_clean(self.sessions.version)
+        
+        if relayout:
+            self.populate_tree()
+        elif changed:
+            self.main_interface.refresh_tasks(list(changed))
+        if conflicts:
+            messagebox.showwarning("External Changes", ScheduleMerge.format_conflicts(conflicts))
+        if row_errors:
+            messagebox.showwarning("Warning", self.csv_loader.format_row_errors(row_errors))
+        if storage.changed_externally():
+            # Changed again while it was being merged
+            self.check_external_changes()
+    
+    def import_csv(self, csv_path, db_path):
+        """Convert a CSV schedule into a SQLite database in the background, then open it"""
+        self.file_frame.show_status(f"Importing {csv_path}...")
+        
+        def on_done(row_errors):
+            self.load_schedule(db_path)
+            if row_errors:
+                messagebox.showwarning("Warning", self.csv_loader.format_row_errors(row_errors, kept=False))
+        
+        def on_error(error):
+            self.file_frame.show_status("")
+            messagebox.showerror("Error", f"Failed to import CSV file: {str(error)}")
+        
+        self.jobs.submit("Importing...", lambda job: SQLiteStorage.import_csv(csv_path, db_path, job.cancel_event),
+                         on_done=on_done, on_error=on_error)
+    
+    def show_main_interface(self):
+        """Show the main interface"""
+        # Clear current widgets
+        for widget in self.winfo_children():
+            widget.destroy()
+        
+        # Setup main interface
+        self.main_interface.setup_main_interface()
+    
+    def populate_tree(self):
+        """Delegate to main interface"""
+        self.main_interface.populate_tree()
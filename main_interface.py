@@ -1,10 +1,32 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
+import bisect
+import datetime
+from virtual_tree import VirtualTreeview
+from perf import tracer, Tracer
+from stats_panel import StatsPanel
 
 class MainInterface:
+    # Milliseconds between refreshes of the --perf readout
+    PERF_REFRESH = 500
+    # Changed rows above which a coalesced refresh rebuilds the tree instead of moving rows one by one
+    BULK_REBUILD = 100
+    
     def __init__(self, main_app):
         self.main_app = main_app
+        self.categorized_on = None
+        self.status_frame = None
+        # Filters applied by populate_tree; "All" means no filtering
+        self.search_query = ""
+        self.status_filter = "All"
+        self.category_filter = "All"
+        self._filter_after = None
+        self.show_source = False
+        self.perf_label = None
+        self.stats_panel = None
+        self._refresh_keys = set()
+        self._refresh_after = None
     
     def setup_main_interface(self):
         """Setup the main interface with treeview and buttons"""
@@ -17,16 +39,50 @@ class MainInterface:
         
         tk.Button(header_frame, text="Change File", command=self.main_app.show_file_selection).pack(side="right")
         
+        # Search and filter bar
+        self.search_query = ""
+        self.status_filter = "All"
+        self.category_filter = "All"
+        filter_frame = tk.Frame(self.main_app)
+        filter_frame.pack(fill="x", padx=10)
+        
+        tk.Label(filter_frame, text="Search:").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_filter())
+        tk.Entry(filter_frame, textvariable=self.search_var, width=30).pack(side="left", padx=5)
+        
+        tk.Label(filter_frame, text="Status:").pack(side="left", padx=(10, 0))
+        self.status_var = tk.StringVar(value="All")
+        status_box = ttk.Combobox(filter_frame, textvariable=self.status_var, state="readonly", width=10,
+                                  values=("All", "Pending", "Complete"))
+        status_box.pack(side="left", padx=5)
+        status_box.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+        
+        from csv_loader import CSVLoader
+        tk.Label(filter_frame, text="Category:").pack(side="left", padx=(10, 0))
+        self.category_var = tk.StringVar(value="All")
+        category_box = ttk.Combobox(filter_frame, textvariable=self.category_var, state="readonly", width=16,
+                                    values=("All",) + CSVLoader.CATEGORIES)
+        category_box.pack(side="left", padx=5)
+        category_box.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+        
         # Treeview
         tree_frame = tk.Frame(self.main_app)
         tree_frame.pack(fill="both", expand=True, padx=10, pady=5)
         
-        self.main_app.tree = ttk.Treeview(tree_frame, columns=("Date", "Topic", "Suggested Tasks", "Status", "Notes"), show="headings")
+        columns = ("Date", "Topic", "Suggested Tasks", "Status", "Notes")
+        # A workspace shows which of its files each row came from
+        self.show_source = hasattr(self.main_app.storage, "source_name")
+        if self.show_source:
+            columns += ("Source",)
+        self.main_app.tree = VirtualTreeview(tree_frame, columns, self.build_row)
         self.main_app.tree.heading("Date", text="Date")
         self.main_app.tree.heading("Topic", text="Focus Topic")
         self.main_app.tree.heading("Suggested Tasks", text="Suggested Tasks")
         self.main_app.tree.heading("Status", text="Status")
         self.main_app.tree.heading("Notes", text="Notes")
+        if self.show_source:
+            self.main_app.tree.heading("Source", text="Source")
         
         # Configure column widths
         self.main_app.tree.column("Date", width=100)
@@ -34,13 +90,16 @@ class MainInterface:
         self.main_app.tree.column("Suggested Tasks", width=300)
         self.main_app.tree.column("Status", width=100)
         self.main_app.tree.column("Notes", width=200)
+        if self.show_source:
+            self.main_app.tree.column("Source", width=150)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.main_app.tree.yview)
-        self.main_app.tree.configure(yscrollcommand=scrollbar.set)
+        # Configure header row styling
+        self.main_app.tree.tag_configure("header", background="lightblue", font=("Arial", 10, "bold"))
+        # Configure selected task styling
+        self.main_app.tree.tag_configure("selected", background="lightgreen", font=("Arial", 9, "bold"))
         
-        self.main_app.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
+        # The view owns its scrollbar, sized from the logical row count
+        self.main_app.tree.pack(fill="both", expand=True)
         
         # Populate tree
         self.populate_tree()
@@ -50,6 +109,11 @@ class MainInterface:
         btn_frame.pack(fill="x", padx=10, pady=5)
         
         tk.Button(btn_frame, text="Edit Task", command=self.main_app.task_actions.edit_task).pack(side="left", padx=5)
+        self.undo_btn = tk.Button(btn_frame, text="Undo", command=self.main_app.task_actions.undo)
+        self.undo_btn.pack(side="left", padx=5)
+        self.redo_btn = tk.Button(btn_frame, text="Redo", command=self.main_app.task_actions.redo)
+        self.redo_btn.pack(side="left", padx=5)
+        self.update_history_buttons()
         tk.Button(btn_frame, text="Select Task", command=self.main_app.task_actions.toggle_selection).pack(side="left", padx=5)
         tk.Button(btn_frame, text="Show Incomplete", command=self.main_app.task_actions.show_incomplete).pack(side="left", padx=5)
         tk.Button(btn_frame, text="Save", command=self.main_app.task_actions.save_progress).pack(side="left", padx=5)
@@ -58,61 +122,254 @@ class MainInterface:
         self.export_btn = tk.Button(btn_frame, text="Export", command=self.show_export_menu)
         self.export_btn.pack(side="left", padx=5)
         
+        # Bulk actions on every selected row
+        self.selection_btn = tk.Button(btn_frame, text="Selection", command=self.show_selection_menu)
+        self.selection_btn.pack(side="left", padx=5)
+        
         self.autosave_btn = tk.Button(btn_frame, text="Enable Autosave", command=self.main_app.task_actions.toggle_autosave)
         self.autosave_btn.pack(side="left", padx=5)
         
+        tk.Button(btn_frame, text="Stats", command=self.show_stats_panel).pack(side="left", padx=5)
+        
+        # Status bar for background jobs (loading, saving, exporting)
+        self.status_frame = tk.Frame(self.main_app)
+        self.status_frame.pack(fill="x", padx=10, pady=(0, 5))
+        self.progress_label = tk.Label(self.status_frame, text="Ready", anchor="w")
+        self.progress_label.pack(side="left")
+        self.cancel_btn = tk.Button(self.status_frame, text="Cancel", command=self.main_app.cancel_jobs, state="disabled")
+        self.cancel_btn.pack(side="right", padx=5)
+        self.progress_bar = ttk.Progressbar(self.status_frame, mode="determinate", maximum=100, length=200)
+        self.progress_bar.pack(side="right", padx=5)
+        self.update_status(list(self.main_app.jobs.active))
+        
+        # Timing of the latest traced operation (--perf)
+        self.perf_label = None
+        if tracer.show_status:
+            self.perf_label = tk.Label(self.main_app, anchor="w", fg="gray30", font=("Arial", 8))
+            self.perf_label.pack(fill="x", padx=10, pady=(0, 5))
+            self.update_perf_readout()
+        
         # Bind double-click
-        self.main_app.tree.bind("<Double-1>", lambda e: self.main_app.task_actions.edit_task())
+        self.main_app.tree.bind_rows("<Double-1>", lambda e: self.main_app.task_actions.edit_task())
+        for sequence, action in (("<Control-z>", self.main_app.task_actions.undo),
+                                 ("<Control-y>", self.main_app.task_actions.redo),
+                                 ("<Control-Z>", self.main_app.task_actions.redo)):
+            self.main_app.bind(sequence, lambda e, action=action: self.on_history_key(e, action))
     
     def populate_tree(self):
-        """Populate the treeview with categorized session data using header rows"""
-        # Clear existing items
-        for item in self.main_app.tree.get_children():
-            self.main_app.tree.delete(item)
-        
+        """Populate the virtual treeview with categorized session data using header rows"""
         # Get categorized sessions
         from csv_loader import CSVLoader
-        categories = CSVLoader.categorize_dates(self.main_app.sessions)
-        
-        # Add sessions by category with header rows
-        for category_name, category_items in categories.items():
-            if category_items:  # Only show categories with items
-                # Sort items within each category by date
-                category_items.sort(key=lambda x: x[0])
-                
-                # Add category header row
-                header_id = f"header_{category_name}"
-                self.main_app.tree.insert("", "end", iid=header_id, values=(
-                    f"--- {category_name} ---",
-                    "",
-                    "",
-                    "",
-                    ""
-                ), tags=("header",))
-                
-                # Add tasks for this category
-                for date, info in category_items:
-                    status = "✓ Complete" if info['completed'] else "⏳ Pending"
-                    notes_preview = info.get('notes', '')[:30] + "..." if len(info.get('notes', '')) > 30 else info.get('notes', '')
-                    suggested_tasks_preview = info.get('suggested_tasks', '')[:50] + "..." if len(info.get('suggested_tasks', '')) > 50 else info.get('suggested_tasks', '')
-                    
-                    # Check if this task is selected for export
-                    tags = ()
-                    if date in self.main_app.task_actions.selected_tasks:
-                        tags = ("selected",)
-                    
-                    self.main_app.tree.insert("", "end", iid=date, values=(
-                        date, 
-                        info['topic'],
-                        suggested_tasks_preview,
-                        status,
-                        notes_preview
-                    ), tags=tags)
+        with tracer.span("populate_tree") as span:
+            self.categorized_on = datetime.date.today()
+            categories = CSVLoader.categorize_dates(self.main_app.sessions, self.categorized_on)
+            
+            matches = self.search_matches()
+            
+            # Only the row ids are laid out here; the view builds values for visible rows
+            rows = []
+            for category_name, category_keys in categories.items():
+                category_keys = self.filter_keys(category_name, category_keys, matches)
+                if category_keys:  # Only show categories with items
+                    # Add category header row; rows already come in date order
+                    rows.append(f"header_{category_name}")
+                    rows.extend(category_keys)
+            
+            self.main_app.tree.set_rows(rows)
+            span.set(rows=len(rows))
+    
+    def refresh_tasks(self, keys):
+        """Patch the given task rows (by row id) in place instead of rebuilding the whole tree"""
+        from csv_loader import CSVLoader
         
-        # Configure header row styling
-        self.main_app.tree.tag_configure("header", background="lightblue", font=("Arial", 10, "bold"))
-        # Configure selected task styling
-        self.main_app.tree.tag_configure("selected", background="lightgreen", font=("Arial", 9, "bold"))
+        # Categories are relative to today, so a new day needs a full rebuild
+        if datetime.date.today() != self.categorized_on:
+            self.populate_tree()
+            return
+        
+        tree = self.main_app.tree
+        matches = self.search_matches()
+        inserts = []
+        for key in keys:
+            category = None
+            if key in self.main_app.sessions:
+                category = CSVLoader.categorize_date(self.main_app.sessions[key].date, self.categorized_on)
+                # Rows hidden by the filter are treated like removed ones
+                if not self.filter_keys(category, (key,), matches):
+                    category = None
+            
+            if tree.contains(key):
+                if category is not None:
+                    # Edits never change a row's date, so it stays in its category
+                    tree.update_row(key)
+                    continue
+                self._remove_row(key)
+            elif category is not None:
+                inserts.append((key, category))
+        
+        # Insert after all removals so sort keys only see live sessions
+        for key, category in inserts:
+            self._insert_row(key, category)
+    
+    def schedule_filter(self):
+        """Re-filter shortly after the user stops typing"""
+        if self._filter_after is not None:
+            self.main_app.after_cancel(self._filter_after)
+        self._filter_after = self.main_app.after(150, self.apply_filter)
+    
+    def apply_filter(self):
+        """Read the filter bar and rebuild the visible rows"""
+        self._filter_after = None
+        self.search_query = self.search_var.get()
+        self.status_filter = self.status_var.get()
+        self.category_filter = self.category_var.get()
+        self.populate_tree()
+    
+    def search_matches(self):
+        """Row ids matching the search box, or None when it is empty"""
+        if not self.search_query.strip():
+            return None
+        index = self.main_app.search_index
+        if not index.ready:
+            # Nothing matches until the index is built; the rows are filtered again then
+            self.main_app.build_search_index()
+            return set()
+        return index.search(self.search_query)
+    
+    def filter_keys(self, category, keys, matches):
+        """The row ids of one category that pass the search, status and category filters"""
+        if self.category_filter not in ("All", category):
+            return ()
+        if matches is None and self.status_filter == "All":
+            return keys
+        
+        if matches is not None:
+            keys = [key for key in keys if key in matches]
+        if self.status_filter != "All":
+            completed = self.main_app.sessions.completed_keys()
+            wanted = self.status_filter == "Complete"
+            keys = [key for key in keys if (key in completed) == wanted]
+        return keys
+    
+    def refresh_task(self, key):
+        """Patch a single task row in place"""
+        self.refresh_tasks((key,))
+    
+    def schedule_refresh(self, keys):
+        """Refresh the given rows once the current event has been handled
+        
+        Bulk actions call this instead of refresh_tasks, so changes made
+        together cost a single pass over the tree.
+        """
+        self._refresh_keys.update(keys)
+        if self._refresh_after is None:
+            self._refresh_after = self.main_app.after_idle(self._flush_refresh)
+    
+    def _flush_refresh(self):
+        self._refresh_after = None
+        keys, self._refresh_keys = self._refresh_keys, set()
+        if self.status_frame is None or not self.status_frame.winfo_exists():
+            # Switched to file selection meanwhile
+            return
+        if len(keys) > self.BULK_REBUILD:
+            self.populate_tree()
+        else:
+            self.refresh_tasks(keys)
+    
+    def _row_sort_key(self, iid):
+        """Sort key matching the layout built by populate_tree"""
+        from csv_loader import CSVLoader
+        if iid.startswith("header_"):
+            return (CSVLoader.CATEGORIES.index(iid[len("header_"):]), 0, "")
+        info = self.main_app.sessions[iid]
+        category = CSVLoader.categorize_date(info.date, self.categorized_on)
+        return (CSVLoader.CATEGORIES.index(category), 1, info.date, int(iid))
+    
+    def _insert_row(self, key, category):
+        """Insert a task row (and its category header if needed) at its sorted position"""
+        tree = self.main_app.tree
+        header_id = f"header_{category}"
+        if not tree.contains(header_id):
+            tree.insert_row(bisect.bisect_left(tree.rows, self._row_sort_key(header_id), key=self._row_sort_key), header_id)
+        tree.insert_row(bisect.bisect_left(tree.rows, self._row_sort_key(key), key=self._row_sort_key), key)
+    
+    def _remove_row(self, key):
+        """Remove a task row and drop its category header if the category is now empty"""
+        tree = self.main_app.tree
+        position = tree.index(key)
+        tree.delete_row(key)
+        
+        # The header sits directly above; it is orphaned if no task follows it
+        header_id = tree.rows[position - 1] if position > 0 else None
+        if header_id and header_id.startswith("header_"):
+            if position >= len(tree.rows) or tree.rows[position].startswith("header_"):
+                tree.delete_row(header_id)
+    
+    def build_row(self, iid):
+        """Return the (values, tags) shown for a row of the virtual treeview"""
+        if iid.startswith("header_"):
+            return (f"--- {iid[len('header_'):]} ---", "", "", "", "", ""), ("header",)
+        
+        info = self.main_app.sessions[iid]
+        status = "✓ Complete" if info.completed else "⏳ Pending"
+        notes_preview = info.note_preview(30)
+        suggested_tasks_preview = info.suggested_tasks[:50] + "..." if len(info.suggested_tasks) > 50 else info.suggested_tasks
+        
+        # Check if this task is selected for export
+        tags = ()
+        if iid in self.main_app.task_actions.selected_tasks:
+            tags = ("selected",)
+        
+        values = (info.date_str, info.topic, suggested_tasks_preview, status, notes_preview)
+        if self.show_source:
+            values += (self.main_app.storage.source_name(iid),)
+        return values, tags
+    
+    def update_status(self, jobs):
+        """JobRunner status callback: show the oldest running job and its progress"""
+        if self.status_frame is None or not self.status_frame.winfo_exists():
+            return
+        
+        if not jobs:
+            self.progress_label.config(text="Ready")
+            self.progress_bar["value"] = 0
+            self.cancel_btn.config(state="disabled")
+            return
+        
+        job = jobs[0]
+        text = job.message
+        if len(jobs) > 1:
+            text += f" (+{len(jobs) - 1} more)"
+        self.progress_label.config(text=text)
+        self.progress_bar["value"] = (job.progress or 0) * 100
+        self.cancel_btn.config(state="normal" if any(j.cancellable for j in jobs) else "disabled")
+    
+    def update_perf_readout(self):
+        """Show the latest span; polled because spans also finish on job threads"""
+        if self.perf_label is None or not self.perf_label.winfo_exists():
+            return
+        last = tracer.last
+        if last is not None:
+            self.perf_label.config(text=Tracer.describe(*last))
+        self.main_app.after(self.PERF_REFRESH, self.update_perf_readout)
+    
+    def update_history_buttons(self):
+        """Enable Undo and Redo only when there is something to undo or redo"""
+        if not hasattr(self, 'undo_btn') or not self.undo_btn.winfo_exists():
+            return
+        history = self.main_app.history
+        self.undo_btn.config(state="normal" if history.can_undo else "disabled")
+        self.redo_btn.config(state="normal" if history.can_redo else "disabled")
+    
+    def on_history_key(self, event, action):
+        """Undo/redo shortcut; text fields keep their own undo"""
+        if isinstance(event.widget, (tk.Entry, tk.Text)):
+            return
+        if self.status_frame is None or not self.status_frame.winfo_exists():
+            # Back at file selection
+            return
+        action()
+        return "break"
     
     def update_autosave_button(self, enabled):
         """Update autosave button text based on state"""
@@ -122,6 +379,26 @@ class MainInterface:
             else:
                 self.autosave_btn.config(text="Enable Autosave", bg="SystemButtonFace", fg="black")
     
+    def show_stats_panel(self):
+        """Open the progress stats window, or raise it if it is already open"""
+        if self.stats_panel is not None and self.stats_panel.winfo_exists():
+            self.stats_panel.lift()
+            return
+        self.stats_panel = StatsPanel(self.main_app, self.main_app.sessions, self.main_app.progress_view)
+    
+    def show_selection_menu(self):
+        """Show the bulk actions for the selected tasks"""
+        task_actions = self.main_app.task_actions
+        menu = tk.Menu(self.main_app, tearoff=0)
+        menu.add_command(label="Mark Complete", command=lambda: task_actions.set_selection_completed(True))
+        menu.add_command(label="Mark Pending", command=lambda: task_actions.set_selection_completed(False))
+        menu.add_command(label="Toggle Export Selection", command=task_actions.toggle_selection)
+        menu.add_command(label="Append Note...", command=task_actions.append_note_to_selection)
+        
+        x = self.selection_btn.winfo_rootx()
+        y = self.selection_btn.winfo_rooty() + self.selection_btn.winfo_height()
+        menu.post(x, y)
+    
     def show_export_menu(self):
         """Show export options menu"""
         menu = tk.Menu(self.main_app, tearoff=0)
@@ -130,6 +407,7 @@ class MainInterface:
         menu.add_separator()
         menu.add_command(label="Export All to Clipboard", command=self.main_app.task_actions.export_all_to_clipboard)
         menu.add_command(label="Export All to File", command=self.main_app.task_actions.export_all_to_file)
+        menu.add_command(label="Export All to CSV", command=self.main_app.task_actions.export_all_to_csv)
         
         # Show menu at button position
         x = self.export_btn.winfo_rootx()
@@ -0,0 +1,167 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+class Span:
+    """One timed operation, used as a context manager or ended explicitly
+    
+    args (row counts, bytes written, ...) end up in the trace event and the
+    status bar readout; set() adds to them while the operation runs.
+    """
+    
+    __slots__ = ('tracer', 'name', 'args', 'start', 'thread', 'memory_start')
+    
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.thread = threading.current_thread()
+        self.memory_start = tracer._begin_memory()
+        self.start = time.perf_counter()
+    
+    def set(self, **args):
+        self.args.update(args)
+    
+    def end(self, **args):
+        self.args.update(args)
+        self.tracer._finish(self, time.perf_counter())
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.end()
+
+class NullSpan:
+    """Shared stand-in while tracing is off, so a hook costs one attribute check"""
+    
+    def set(self, **args):
+        pass
+    
+    def end(self, **args):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+NULL_SPAN = NullSpan()
+
+class Tracer:
+    """Collects timed spans and writes them as a Chrome trace (chrome://tracing)
+    
+    Off unless enabled with --trace/--perf on the command line or the
+    LEARNING_TRACKER_TRACE (output path) / LEARNING_TRACKER_PERF environment
+    variables. Peak memory per span comes from tracemalloc, which slows
+    Python down noticeably, so it only runs while tracing is on; spans that
+    overlap on different threads share one peak, so theirs are upper bounds.
+    """
+    
+    TRACE_ENV = "LEARNING_TRACKER_TRACE"
+    PERF_ENV = "LEARNING_TRACKER_PERF"
+    
+    def __init__(self):
+        self.enabled = False
+        self.trace_path = None
+        self.show_status = False
+        self.last = None  # (name, milliseconds, args) of the latest span, for the status bar
+        self._events = []
+        self._threads = {}
+        self._open = 0
+        self._peak = 0
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+    
+    def configure(self, trace_path=None, show_status=False):
+        """Turn tracing on if a trace file or the status readout is requested (or set in the environment)"""
+        trace_path = trace_path or os.environ.get(self.TRACE_ENV) or None
+        show_status = show_status or bool(os.environ.get(self.PERF_ENV))
+        if not (trace_path or show_status):
+            return
+        self.trace_path = trace_path
+        self.show_status = show_status
+        # Imported here: tracemalloc is slow to import and the CLI must start fast
+        import tracemalloc
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+        if trace_path:
+            # Also written on a crash, which is when a trace is most wanted
+            atexit.register(self.write)
+    
+    def span(self, name, **args):
+        """Start timing an operation; returns a Span (or NULL_SPAN when tracing is off)"""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args)
+    
+    def _begin_memory(self):
+        import tracemalloc
+        with self._lock:
+            if self._open == 0:
+                # No other span running, so the peak can be measured from here
+                tracemalloc.reset_peak()
+            self._open += 1
+            return tracemalloc.get_traced_memory()[0]
+    
+    def _finish(self, span, end):
+        import tracemalloc
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak = max(self._peak, peak)
+        span.args['peak_memory_kb'] = max(peak - span.memory_start, 0) // 1024
+        duration = end - span.start
+        thread = span.thread
+        event = {
+            'name': span.name,
+            'ph': 'X',
+            'ts': round((span.start - self._origin) * 1e6, 1),
+            'dur': round(duration * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': thread.ident,
+            'args': span.args,
+        }
+        with self._lock:
+            self._open -= 1
+            self._events.append(event)
+            self._threads[thread.ident] = thread.name
+            self.last = (span.name, duration * 1000, span.args)
+    
+    @staticmethod
+    def describe(name, milliseconds, args):
+        """One-line summary of a span for the status bar"""
+        details = [f"{args['rows']:,} rows"] if 'rows' in args else []
+        if args.get('bytes'):
+            details.append(f"{args['bytes'] / 1024:,.0f} KiB")
+        details.append(f"peak {args.get('peak_memory_kb', 0):,} KiB")
+        return f"{name}: {milliseconds:,.1f} ms ({', '.join(details)})"
+    
+    def write(self, path=None):
+        """Write the spans collected so far as Chrome trace JSON"""
+        path = path or self.trace_path
+        if not path:
+            return
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        metadata = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident, 'args': {'name': name}}
+                    for ident, name in threads.items()]
+        trace = {
+            'traceEvents': metadata + events,
+            'displayTimeUnit': 'ms',
+            'otherData': {'python': sys.version.split()[0], 'platform': sys.platform,
+                          'peak_traced_memory_kb': self._peak // 1024},
+        }
+        temp_path = path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        os.replace(temp_path, path)
+
+# The one tracer the hooks throughout the app report to
+tracer = Tracer()
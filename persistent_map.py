@@ -0,0 +1,194 @@
+_MISSING = object()
+
+class PersistentMap:
+    """Immutable hash map that shares structure between versions
+    
+    Keys are spread over a fixed three-level trie of 32-way nodes with small
+    dict buckets at the leaves. set() and delete() copy only the path to one
+    bucket and return a new map, so old versions stay valid and cost memory
+    proportional to what changed. Nodes are never mutated once published,
+    which makes a map safe to read from any thread without locking.
+    """
+    
+    __slots__ = ('_root', '_size')
+    
+    WIDTH = 32
+    
+    def __init__(self, items=None):
+        self._root = None
+        self._size = 0
+        if items:
+            self._root, self._size = self._updated(items)
+    
+    @staticmethod
+    def _make(root, size):
+        new_map = PersistentMap.__new__(PersistentMap)
+        new_map._root = root
+        new_map._size = size
+        return new_map
+    
+    def __len__(self):
+        return self._size
+    
+    def __bool__(self):
+        return self._size > 0
+    
+    def get(self, key, default=None):
+        h = hash(key)
+        node = self._root
+        if node is None:
+            return default
+        node = node[h & 31]
+        if node is None:
+            return default
+        node = node[(h >> 5) & 31]
+        if node is None:
+            return default
+        bucket = node[(h >> 10) & 31]
+        if bucket is None:
+            return default
+        return bucket.get(key, default)
+    
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+    
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+    
+    def __iter__(self):
+        for bucket in self._buckets():
+            yield from bucket
+    
+    def keys(self):
+        return iter(self)
+    
+    def values(self):
+        for bucket in self._buckets():
+            yield from bucket.values()
+    
+    def items(self):
+        for bucket in self._buckets():
+            yield from bucket.items()
+    
+    def _buckets(self):
+        if self._root is None:
+            return
+        for level1 in self._root:
+            if level1 is None:
+                continue
+            for level2 in level1:
+                if level2 is None:
+                    continue
+                for bucket in level2:
+                    if bucket:
+                        yield bucket
+    
+    def set(self, key, value):
+        """Return a new map with key set to value"""
+        h = hash(key)
+        i0, i1, i2 = h & 31, (h >> 5) & 31, (h >> 10) & 31
+        
+        root = list(self._root) if self._root is not None else [None] * self.WIDTH
+        level1 = list(root[i0]) if root[i0] is not None else [None] * self.WIDTH
+        level2 = list(level1[i1]) if level1[i1] is not None else [None] * self.WIDTH
+        bucket = dict(level2[i2]) if level2[i2] is not None else {}
+        
+        size = self._size + (key not in bucket)
+        bucket[key] = value
+        level2[i2] = bucket
+        level1[i1] = level2
+        root[i0] = level1
+        return PersistentMap._make(root, size)
+    
+    def delete(self, key):
+        """Return a new map without key (raises KeyError if it is missing)"""
+        h = hash(key)
+        i0, i1, i2 = h & 31, (h >> 5) & 31, (h >> 10) & 31
+        if key not in self:
+            raise KeyError(key)
+        
+        root = list(self._root)
+        level1 = list(root[i0])
+        level2 = list(level1[i1])
+        bucket = dict(level2[i2])
+        del bucket[key]
+        
+        level2[i2] = bucket or None
+        level1[i1] = level2
+        root[i0] = level1
+        return PersistentMap._make(root, self._size - 1)
+    
+    def update(self, items):
+        """Return a new map with all (key, value) pairs applied, copying each touched node once"""
+        root, size = self._updated(items)
+        return PersistentMap._make(root, size)
+    
+    def _updated(self, items):
+        if hasattr(items, 'items'):
+            items = items.items()
+        if self._root is None:
+            return PersistentMap._built(items)
+        
+        root = list(self._root) if self._root is not None else [None] * self.WIDTH
+        size = self._size
+        # Nodes created by this update are private until it returns, so they can be mutated
+        fresh = set()
+        for key, value in items:
+            h = hash(key)
+            i0, i1, i2 = h & 31, (h >> 5) & 31, (h >> 10) & 31
+            
+            level1 = root[i0]
+            if level1 is None:
+                level1 = root[i0] = [None] * self.WIDTH
+                fresh.add(id(level1))
+            elif id(level1) not in fresh:
+                level1 = root[i0] = list(level1)
+                fresh.add(id(level1))
+            
+            level2 = level1[i1]
+            if level2 is None:
+                level2 = level1[i1] = [None] * self.WIDTH
+                fresh.add(id(level2))
+            elif id(level2) not in fresh:
+                level2 = level1[i1] = list(level2)
+                fresh.add(id(level2))
+            
+            bucket = level2[i2]
+            if bucket is None:
+                bucket = level2[i2] = {}
+                fresh.add(id(bucket))
+            elif id(bucket) not in fresh:
+                bucket = level2[i2] = dict(bucket)
+                fresh.add(id(bucket))
+            
+            if key not in bucket:
+                size += 1
+            bucket[key] = value
+        return root, size
+    
+    @staticmethod
+    def _built(items):
+        """Build a trie from scratch: bucket everything first, then assemble the nodes"""
+        buckets = {}
+        for key, value in items:
+            index = hash(key) & 0x7FFF
+            bucket = buckets.get(index)
+            if bucket is None:
+                bucket = buckets[index] = {}
+            bucket[key] = value
+        
+        root = [None] * PersistentMap.WIDTH
+        size = 0
+        for index, bucket in buckets.items():
+            level1 = root[index & 31]
+            if level1 is None:
+                level1 = root[index & 31] = [None] * PersistentMap.WIDTH
+            level2 = level1[(index >> 5) & 31]
+            if level2 is None:
+                level2 = level1[(index >> 5) & 31] = [None] * PersistentMap.WIDTH
+            level2[index >> 10] = bucket
+            size += len(bucket)
+        return root, size
@@ -0,0 +1,205 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+from lazy_notes import LazyNote, NoteSource
+from session import Session
+
+class ScheduleCache:
+    """Pickled parse results of recently opened CSV files, for instant reopen
+    
+    Entries are keyed by absolute path. A file with the size, mtime and inode
+    it had when cached is taken as unchanged without reading it; otherwise a
+    file of the same size is hashed, so one that was only touched or copied
+    back still hits while an edited one is always parsed again. Rows
+    are stored in date order, which lets the store build its date index with
+    a linear merge. The least recently used entries are evicted once the
+    cache grows past max_bytes.
+    """
+    
+    DIRECTORY = "schedule_cache"
+    INDEX = "index.json"
+    MAX_BYTES = 256 * 1024 * 1024
+    # Bumped whenever the pickled layout changes; older entries are ignored
+    FORMAT = 3
+    
+    _lock = threading.Lock()
+    
+    def __init__(self, directory=DIRECTORY, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+    
+    @staticmethod
+    def file_key(file_path):
+        """Cheap identity of the file's current contents: (size, mtime in ns)"""
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+    
+    @staticmethod
+    def content_hash(file_path):
+        import hashlib
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def load(self, file_path):
+        """Return (sessions, row_errors) cached for the file as it is now, or None"""
+        import pickle
+        path = os.path.abspath(file_path)
+        with self._lock:
+            index = self._read_index()
+            entry = index.get(path)
+        if entry is None or entry.get('format') != self.FORMAT:
+            return None
+        
+        try:
+            stat = os.stat(path)
+            if stat.st_size != entry['size']:
+                self.invalidate(path)
+                return None
+            stamp = (stat.st_mtime_ns, stat.st_ino)
+            if stamp != (entry['mtime_ns'], entry.get('inode')) and self.content_hash(path) != entry['hash']:
+                self.invalidate(path)
+                return None
+            with open(os.path.join(self.directory, entry['file']), 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, ValueError):
+            self.invalidate(path)
+            return None
+        
+        with self._lock:
+            index = self._read_index()
+            if path in index:
+                # Same contents under a new mtime or inode: skip the hash next time
+                index[path].update(used=time.time(), mtime_ns=stamp[0], inode=stamp[1])
+                self._write_index(index)
+        return self.unpack(path, data), data['errors']
+    
+    def store(self, file_path, file_key, sessions, errors):
+        """Cache parse results for the file, if it still matches file_key from before the parse"""
+        import hashlib
+        import pickle
+        path = os.path.abspath(file_path)
+        content_hash = self.content_hash(path)
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) != file_key:
+            # Changed while it was being parsed; the results may not match the contents
+            return
+        
+        data = self.pack(path, sessions, errors)
+        if data is None:
+            return
+        
+        os.makedirs(self.directory, exist_ok=True)
+        name = hashlib.sha1(path.encode('utf-8')).hexdigest() + ".pickle"
+        fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, os.path.join(self.directory, name))
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        with self._lock:
+            index = self._read_index()
+            index[path] = {
+                'format': self.FORMAT,
+                'file': name,
+                'size': file_key[0],
+                'mtime_ns': file_key[1],
+                'inode': stat.st_ino,
+                'hash': content_hash,
+                'bytes': os.path.getsize(os.path.join(self.directory, name)),
+                'used': time.time(),
+            }
+            self._evict(index)
+            self._write_index(index)
+    
+    def invalidate(self, file_path):
+        """Drop the entry for a file"""
+        with self._lock:
+            index = self._read_index()
+            entry = index.pop(os.path.abspath(file_path), None)
+            if entry is not None:
+                self._remove_file(entry)
+                self._write_index(index)
+    
+    @staticmethod
+    def pack(path, sessions, errors):
+        """Flatten parse results of a file to picklable plain data
+        
+        Rows become tuples in date order and lazy notes keep only their offsets,
+        preview and digest.
+        Returns None if a lazy note has been moved to another file by a save.
+        """
+        data = {'errors': errors, 'notes_column': None, 'rows': []}
+        rows = data['rows']
+        def date_order(item):
+            key, info = item
+            return (info.date is None, info.date or datetime.date.min, int(key))
+        
+        for key, info in sorted(sessions.items(), key=date_order):
+            note = info.lazy_note
+            if note is None:
+                notes = info.notes
+            else:
+                source, start, end = note.location
+                if not source.maps(path):
+                    return None
+                data['notes_column'] = source.notes_column
+                notes = (start, end, note.preview, note.digest)
+            ordinal = info.date.toordinal() if info.date is not None else None
+            rows.append((key, info.date_str, ordinal, info.topic, info.suggested_tasks, info.completed, notes))
+        return data
+    
+    @staticmethod
+    def unpack(path, data):
+        """Rebuild the sessions {row id: Session} from pack() output"""
+        source = None
+        if data['notes_column'] is not None:
+            source = NoteSource(path, data['notes_column'])
+        sessions = {}
+        from_ordinal = datetime.date.fromordinal
+        for key, date_str, ordinal, topic, suggested_tasks, completed, notes in data['rows']:
+            if not isinstance(notes, str):
+                start, end, preview, digest = notes
+                notes = LazyNote(source, start, end, preview, digest)
+            date = from_ordinal(ordinal) if ordinal is not None else None
+            sessions[key] = Session.restore(date_str, date, topic, suggested_tasks, completed, notes)
+        return sessions
+    
+    def _evict(self, index):
+        """Remove least recently used entries until the cache fits in max_bytes"""
+        total = sum(entry['bytes'] for entry in index.values())
+        for path, entry in sorted(index.items(), key=lambda item: item[1]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= entry['bytes']
+            del index[path]
+            self._remove_file(entry)
+    
+    def _remove_file(self, entry):
+        try:
+            os.remove(os.path.join(self.directory, entry['file']))
+        except OSError:
+            pass
+    
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.directory, self.INDEX), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write_index(self, index):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = os.path.join(self.directory, self.INDEX + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(temp_path, os.path.join(self.directory, self.INDEX))
@@ -0,0 +1,260 @@
+import bisect
+import re
+import sys
+from lazy_notes import LazyNote, SQLiteNoteSource
+
+class SearchIndex:
+    """Inverted index from words to the row ids of the sessions containing them
+    
+    Covers topic, suggested tasks and notes. Nothing is indexed until the
+    first search: build() tokenizes a snapshot of the store on a job thread,
+    and from then on a store listener queues the sessions that change, which
+    are re-indexed a slice at a time when the Tk loop is idle. Queries look
+    words up by prefix in a sorted vocabulary instead of scanning session text.
+    
+    Only the shared postings are stored, not each row's words: to re-index a
+    row, the session it was indexed from is kept until then (taken from the
+    store version before the change) and tokenized again to find its words.
+    
+    Lazy notes are indexed by their preview only, so indexing never reads them
+    from the file. The rest of their text is searched where it lies: each
+    query word is looked for in the note's bytes in the memory-mapped file,
+    from the offset where the note starts, without parsing the row. Notes
+    left in a SQLite database are searched with one query per word.
+    """
+    
+    WORD = re.compile(r"\w+")
+    # Changed sessions re-indexed per idle callback
+    SLICE = 500
+    # Preview characters looked up in a row to find where its note starts
+    NOTE_ANCHOR = 8
+    
+    def __init__(self, defer=None):
+        self.defer = defer  # e.g. Tk's after_idle, to catch up with changes between searches
+        self.sessions = None
+        self._postings = None  # word -> set of row ids; None until built
+        self._words = []  # sorted vocabulary, for prefix lookups with bisect
+        self._lazy = {}  # row id -> LazyNote of the indexed session
+        self._note_starts = {}  # row id -> (note location, file offset of the note or None)
+        self._pending = None  # changed row id -> session as indexed (None if new), None until build starts
+        self._current = None  # the store's sessions as of the last notification
+        self._catching_up = False
+    
+    @property
+    def ready(self):
+        return self._postings is not None
+    
+    def attach(self, sessions):
+        """Follow the store; nothing is indexed until build()"""
+        self.sessions = sessions
+        sessions.add_listener(self._on_change)
+    
+    def _on_change(self, keys):
+        if self._pending is None:
+            return
+        before, self._current = self._current, self.sessions.snapshot().sessions
+        pending = self._pending
+        for key in keys:
+            # Only the first change since the row was indexed tells what to unindex
+            if key not in pending:
+                pending[key] = before.get(key)
+        if self.ready:
+            self._schedule_catch_up()
+    
+    @classmethod
+    def tokenize(cls, text):
+        return cls.WORD.findall(text.lower())
+    
+    def start_build(self):
+        """Tk thread: snapshot the store for build(); changes from here on are queued"""
+        snapshot = self.sessions.snapshot()
+        self._pending = {}
+        self._current = snapshot.sessions
+        return snapshot
+    
+    @staticmethod
+    def build(snapshot, cancel_event=None):
+        """Any thread: index a snapshot, returning an index for install() (None if cancelled)"""
+        built = SearchIndex()
+        built._postings = {}
+        keys = list(snapshot.sessions.keys())
+        for i in range(0, len(keys), SearchIndex.SLICE):
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            built._update(snapshot, [(key, None) for key in keys[i:i + SearchIndex.SLICE]])
+        return built
+    
+    def install(self, built):
+        """Tk thread: take over what build() indexed, then catch up with later changes"""
+        self._postings = built._postings
+        self._words = built._words
+        self._lazy = built._lazy
+        if self._pending:
+            self._schedule_catch_up()
+    
+    def _schedule_catch_up(self):
+        if self.defer is not None and not self._catching_up:
+            self._catching_up = True
+            self.defer(self._catch_up_slice)
+    
+    def _catch_up_slice(self):
+        self._catching_up = False
+        pending = self._pending
+        if not pending:
+            return
+        changes = [pending.popitem() for _ in range(min(self.SLICE, len(pending)))]
+        self._update(self.sessions, changes)
+        if pending:
+            self._schedule_catch_up()
+    
+    @classmethod
+    def _session_words(cls, info):
+        """The words a session is indexed under; lazy notes count by their preview"""
+        note = info.lazy_note
+        notes = info.notes if note is None else note.preview
+        return set(cls.tokenize(f"{info.topic} {info.suggested_tasks} {notes}"))
+    
+    def _update(self, sessions, changes):
+        """Re-index rows from sessions, given (row id, session it was indexed from or None) pairs"""
+        new_words = []
+        postings_of = self._postings
+        for key, old in changes:
+            if old is not None:
+                for word in self._session_words(old):
+                    postings = postings_of[word]
+                    postings.discard(key)
+                    if not postings:
+                        del postings_of[word]
+                        self._words.pop(bisect.bisect_left(self._words, word))
+                self._lazy.pop(key, None)
+            
+            info = sessions.get(key)
+            if info is None:
+                continue
+            note = info.lazy_note
+            if note is not None:
+                self._lazy[key] = note
+            for word in self._session_words(info):
+                postings = postings_of.get(word)
+                if postings is None:
+                    postings = postings_of[word] = set()
+                    new_words.append(sys.intern(word))
+                postings.add(key)
+        
+        if new_words:
+            # Same merge as the store's date index: Timsort handles sorted runs in linear time
+            new_words.sort()
+            self._words.extend(new_words)
+            self._words.sort()
+    
+    def prefix_matches(self, prefix):
+        """Row ids of sessions containing a word that starts with prefix"""
+        words = self._words
+        matches = set()
+        for i in range(bisect.bisect_left(words, prefix), len(words)):
+            if not words[i].startswith(prefix):
+                break
+            matches |= self._postings[words[i]]
+        return matches
+    
+    def _note_start(self, key, note):
+        """File offset where a lazy note's text starts, or None if it can't be told cheaply"""
+        location = note.location
+        cached = self._note_starts.get(key)
+        if cached is not None and cached[0] is location:
+            return cached[1]
+        source, start, end = location
+        # The start of the preview up to anything CSV quoting could have changed
+        anchor = re.split(r'["\r\n]', note.preview, 1)[0]
+        offset = None
+        if len(anchor) >= self.NOTE_ANCHOR:
+            found = source.find(anchor.encode('utf-8'), start, end)
+            if found >= 0:
+                offset = found
+        self._note_starts[key] = (location, offset)
+        return offset
+    
+    def _word_in_note(self, key, note, term):
+        """Whether the lazy note has a word starting with term, read as raw bytes"""
+        source, start, end = note.location
+        begin = self._note_start(key, note)
+        if begin is None:
+            # No anchor to skip the other fields by, so parse the note itself
+            return any(word.startswith(term) for word in self.tokenize(note.read()))
+        return self._has_word(source.read_bytes(begin, end).lower(), term.encode('utf-8'))
+    
+    @staticmethod
+    def _has_word(data, needle):
+        """Whether a word of data starts with needle, both lower-cased UTF-8 bytes"""
+        position = data.find(needle)
+        while position >= 0:
+            # A word starts here unless an ASCII word character or part of a
+            # multi-byte character comes right before it
+            if position == 0 or not (data[position - 1] >= 0x80 or data[position - 1:position].isalnum()
+                                     or data[position - 1] == 0x5f):
+                return True
+            position = data.find(needle, position + 1)
+        return False
+    
+    def lazy_matches(self, term, within=None):
+        """Row ids whose lazy note has a word starting with term, searched in the file
+        
+        Restricted to the row ids in within when given. Words are told apart
+        by ASCII rules and case is folded for ASCII letters only.
+        """
+        lazy = self._lazy
+        if within is not None and len(within) < len(lazy):
+            keys = [key for key in within if key in lazy]
+        else:
+            keys = lazy if within is None else [key for key in lazy if key in within]
+        matches = set()
+        in_database = {}  # SQLiteNoteSource -> row id -> row id in the store
+        # Not while a save is moving the notes to the file replacing theirs
+        with LazyNote.moving:
+            for key in keys:
+                source, start, end = lazy[key].location
+                if isinstance(source, SQLiteNoteSource):
+                    in_database.setdefault(source, {})[start] = key
+                    continue
+                try:
+                    if self._word_in_note(key, lazy[key], term):
+                        matches.add(key)
+                except (OSError, ValueError):
+                    # The file changed under the note, which can't be read either
+                    continue
+        needle = term.encode('utf-8')
+        for source, rows in in_database.items():
+            try:
+                found = source.rows_containing(term, LazyNote.THRESHOLD)
+            except (OSError, ValueError):
+                continue
+            for row_id, notes in found:
+                key = rows.get(row_id)
+                if key is not None and self._has_word(notes.encode('utf-8').lower(), needle):
+                    matches.add(key)
+        return matches
+    
+    def search(self, query):
+        """Row ids matching every word of the query as a prefix, or None for an empty query
+        
+        The index must be built; changes not re-indexed yet are caught up first.
+        """
+        terms = self.tokenize(query)
+        if not terms:
+            return None
+        if self._pending:
+            self._update(self.sessions, list(self._pending.items()))
+            self._pending.clear()
+        
+        results = None
+        # Longer terms tend to be more selective, so intersect those first
+        for term in sorted(set(terms), key=len, reverse=True):
+            matches = self.prefix_matches(term)
+            if results is not None:
+                matches &= results
+            # The file only needs searching for rows not already matched
+            matches |= self.lazy_matches(term, None if results is None else results - matches)
+            results = matches
+            if not results:
+                break
+        return results
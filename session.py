@@ -0,0 +1,88 @@
+import datetime
+import sys
+
+class Session:
+    """A single scheduled task, with its date parsed once at load time
+    
+    Long notes may be a LazyNote that is only read from the file when the
+    notes property is accessed; note_preview() never reads it.
+    """
+    
+    __slots__ = ('date_str', 'date', 'topic', 'suggested_tasks', 'completed', '_notes')
+    
+    def __init__(self, date_str, topic, suggested_tasks='', completed=False, notes=''):
+        self.date_str = sys.intern(date_str)
+        self.date = Session.parse_date(date_str)
+        self.topic = sys.intern(topic)
+        self.suggested_tasks = sys.intern(suggested_tasks)
+        self.completed = bool(completed)
+        self._notes = sys.intern(notes) if isinstance(notes, str) else notes
+    
+    @staticmethod
+    def restore(date_str, date, topic, suggested_tasks, completed, notes):
+        """Rebuild a session from cached fields without parsing the date again"""
+        session = Session.__new__(Session)
+        session.date_str = sys.intern(date_str)
+        session.date = date
+        session.topic = sys.intern(topic)
+        session.suggested_tasks = sys.intern(suggested_tasks)
+        session.completed = completed
+        session._notes = sys.intern(notes) if isinstance(notes, str) else notes
+        return session
+    
+    @staticmethod
+    def parse_date(date_str):
+        """Parse a YYYY-MM-DD string, returning None for invalid dates"""
+        # fromisoformat is far faster than strptime (and needs no import of _strptime);
+        # the separator check keeps it from accepting other ISO forms like week dates
+        if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+            try:
+                return datetime.date.fromisoformat(date_str)
+            except ValueError:
+                return None
+        try:
+            return datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            return None
+    
+    def replace(self, notes=None, completed=None):
+        """Return an edited copy; sessions are never changed in place once stored"""
+        copy = Session.__new__(Session)
+        copy.date_str = self.date_str
+        copy.date = self.date
+        copy.topic = self.topic
+        copy.suggested_tasks = self.suggested_tasks
+        copy.completed = self.completed if completed is None else bool(completed)
+        if notes is None:
+            copy._notes = self._notes
+        else:
+            copy._notes = sys.intern(notes) if isinstance(notes, str) else notes
+        return copy
+    
+    @property
+    def notes(self):
+        """Full notes text, read from the file if it was left there"""
+        notes = self._notes
+        return notes if isinstance(notes, str) else notes.read()
+    
+    @property
+    def lazy_note(self):
+        """The LazyNote behind notes, or None if the text is in memory"""
+        notes = self._notes
+        return None if isinstance(notes, str) else notes
+    
+    def note_preview(self, limit):
+        """The first limit characters of the notes, with "..." if there is more"""
+        notes = self._notes
+        if not isinstance(notes, str):
+            # Lazy notes are always longer than their preview
+            return notes.preview[:limit] + "..."
+        return notes[:limit] + "..." if len(notes) > limit else notes
+    
+    @property
+    def status(self):
+        """Status as written to the CSV file"""
+        return "Complete" if self.completed else "Pending"
+    
+    def __repr__(self):
+        return f"Session({self.date_str!r}, {self.topic!r}, completed={self.completed})"
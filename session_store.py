@@ -0,0 +1,292 @@
+import bisect
+import datetime
+import threading
+from persistent_map import PersistentMap
+
+class StoreSnapshot:
+    """Immutable view of the store at one version, safe to read from any thread"""
+    
+    __slots__ = ('version', 'sessions')
+    
+    def __init__(self, version, sessions):
+        self.version = version
+        self.sessions = sessions
+    
+    def __getitem__(self, key):
+        return self.sessions[key]
+    
+    def __contains__(self, key):
+        return key in self.sessions
+    
+    def __len__(self):
+        return len(self.sessions)
+    
+    def __iter__(self):
+        return iter(self.sessions)
+    
+    def get(self, key, default=None):
+        return self.sessions.get(key, default)
+    
+    def items(self):
+        return self.sessions.items()
+    
+    def date_order(self, keys):
+        """Sort the row ids present in this version by date, then file order; undated rows go last"""
+        sessions = self.sessions
+        entries = []
+        for key in keys:
+            info = sessions.get(key)
+            if info is not None:
+                entries.append((info.date is None, info.date or datetime.date.min, int(key), key))
+        entries.sort()
+        return [entry[3] for entry in entries]
+
+class SessionStore:
+    """Sessions keyed by a stable row id, with secondary indexes
+    
+    Row ids are the position of the row among the parsed rows of the file
+    (as strings, so they double as Treeview iids). Several rows may share a
+    date; the date, topic and status indexes map back to their row ids, and a
+    sorted (date, row, id) index gives date order.
+    
+    Sessions live in a PersistentMap and every change publishes a new
+    StoreSnapshot with a single reference assignment. The Tk thread is the
+    only writer; background consumers (autosave, export) call snapshot() and
+    get a consistent version without taking a lock. Sessions themselves are
+    immutable, so edits replace the record rather than changing it.
+    """
+    
+    # Display order of the date categories
+    CATEGORIES = ('Overdue', 'Today', 'Tomorrow', 'This Week', 'More than a week')
+    
+    def __init__(self, sessions=None):
+        self.version = 0
+        self._snapshot = StoreSnapshot(0, PersistentMap(sessions))
+        # Sorted (date, row number, id) triples for every session with a valid date
+        self._index = []
+        # Secondary indexes: date string -> ids, topic -> number of sessions, ids of completed sessions
+        self._by_date = {}
+        self._topic_counts = {}
+        self._completed = set()
+        # Sessions given in date order (as from the schedule cache) make this sort linear
+        for key, info in (sessions.items() if sessions else ()):
+            self._add_to_indexes(key, info)
+        self._index.sort()
+        # Change tracking: version last written to disk and {key: version} of unsaved edits
+        self.saved_version = 0
+        self.dirty = {}
+        # Saves clean dirty on job threads while edits add to it on the Tk thread
+        self._dirty_lock = threading.Lock()
+        self._listeners = []
+        self._categories_key = None
+        self._categories = None
+    
+    def snapshot(self):
+        """Return the current immutable version of the sessions"""
+        return self._snapshot
+    
+    def __getitem__(self, key):
+        return self._snapshot.sessions[key]
+    
+    def __contains__(self, key):
+        return key in self._snapshot.sessions
+    
+    def __len__(self):
+        return len(self._snapshot.sessions)
+    
+    def __iter__(self):
+        return iter(self._snapshot.sessions)
+    
+    def get(self, key, default=None):
+        return self._snapshot.sessions.get(key, default)
+    
+    def keys(self):
+        return self._snapshot.sessions.keys()
+    
+    def values(self):
+        return self._snapshot.sessions.values()
+    
+    def items(self):
+        return self._snapshot.sessions.items()
+    
+    def __setitem__(self, key, info):
+        """Insert or replace a session, updating the indexes incrementally"""
+        sessions = self._snapshot.sessions
+        old = sessions.get(key)
+        if old is not None:
+            self._remove_from_indexes(key, old)
+        self._add_to_indexes(key, info, insort=True)
+        self._publish(sessions.set(key, info), (key,))
+    
+    def __delitem__(self, key):
+        sessions = self._snapshot.sessions
+        self._remove_from_indexes(key, sessions[key])
+        self._publish(sessions.delete(key), (key,))
+    
+    def add_many(self, sessions):
+        """Insert a batch of sessions, merging them into the date index in one sort"""
+        current = self._snapshot.sessions
+        for key, info in sessions.items():
+            old = current.get(key)
+            if old is not None:
+                self._remove_from_indexes(key, old)
+            self._add_to_indexes(key, info)
+        # Timsort merges the already sorted index with the new run in linear time
+        self._index.sort()
+        self._publish(current.update(sessions), sessions)
+    
+    def apply_changes(self, changed, removed=()):
+        """Replace, insert and delete sessions as a single change with one notification"""
+        sessions = self._snapshot.sessions
+        # Take every old entry out of the sorted index before appending the new ones
+        for key in removed:
+            self._remove_from_indexes(key, sessions[key])
+            sessions = sessions.delete(key)
+        moved = {}
+        for key, info in changed.items():
+            old = sessions.get(key)
+            if old is not None and old.date_str == info.date_str and old.topic == info.topic:
+                # Same entries in the date and topic indexes; only the status can differ
+                if info.completed:
+                    self._completed.add(key)
+                else:
+                    self._completed.discard(key)
+                continue
+            if old is not None:
+                self._remove_from_indexes(key, old)
+            moved[key] = info
+        for key, info in moved.items():
+            self._add_to_indexes(key, info)
+        if moved:
+            self._index.sort()
+        self._publish(sessions.update(changed), list(changed) + list(removed))
+    
+    def update(self, key, notes=None, completed=None):
+        """Replace a session with an edited copy; date and topic (and so their indexes) are unchanged"""
+        sessions = self._snapshot.sessions
+        info = sessions[key].replace(notes=notes, completed=completed)
+        if info.completed:
+            self._completed.add(key)
+        else:
+            self._completed.discard(key)
+        self._publish(sessions.set(key, info), (key,))
+    
+    def update_many(self, changes):
+        """Edit several sessions as a single change with one notification
+        
+        changes maps row id -> (notes, completed), None leaving a field as it is.
+        """
+        sessions = self._snapshot.sessions
+        edited = {}
+        for key, (notes, completed) in changes.items():
+            info = edited[key] = sessions[key].replace(notes=notes, completed=completed)
+            if info.completed:
+                self._completed.add(key)
+            else:
+                self._completed.discard(key)
+        self._publish(sessions.update(edited), list(edited))
+    
+    def _add_to_indexes(self, key, info, insort=False):
+        """Index a session; the date index is appended to unless insort is set"""
+        if info.date is not None:
+            entry = (info.date, int(key), key)
+            if insort:
+                bisect.insort(self._index, entry)
+            else:
+                self._index.append(entry)
+        self._by_date.setdefault(info.date_str, set()).add(key)
+        self._topic_counts[info.topic] = self._topic_counts.get(info.topic, 0) + 1
+        if info.completed:
+            self._completed.add(key)
+    
+    def _remove_from_indexes(self, key, info):
+        if info.date is not None:
+            self._index.pop(bisect.bisect_left(self._index, (info.date, int(key), key)))
+        keys = self._by_date[info.date_str]
+        keys.discard(key)
+        if not keys:
+            del self._by_date[info.date_str]
+        count = self._topic_counts[info.topic] - 1
+        if count:
+            self._topic_counts[info.topic] = count
+        else:
+            del self._topic_counts[info.topic]
+        self._completed.discard(key)
+    
+    def keys_for_date(self, date_str):
+        """Row ids of the sessions on a date, in file order"""
+        return sorted(self._by_date.get(date_str, ()), key=int)
+    
+    def topics(self):
+        return list(self._topic_counts)
+    
+    def completed_keys(self):
+        """Row ids of completed sessions; a live set, so treat it as read-only"""
+        return self._completed
+    
+    def date_order(self, keys):
+        """Sort row ids by date, then file order; see StoreSnapshot.date_order"""
+        return self._snapshot.date_order(keys)
+    
+    def add_listener(self, callback):
+        """Register callback(keys) to be called after every change"""
+        self._listeners.append(callback)
+    
+    def _publish(self, sessions, keys):
+        """Publish a new version, mark the keys dirty and notify listeners"""
+        self.version += 1
+        # A single assignment, so readers on other threads see the old or the new version
+        self._snapshot = StoreSnapshot(self.version, sessions)
+        with self._dirty_lock:
+            for key in keys:
+                self.dirty[key] = self.version
+        for callback in self._listeners:
+            callback(keys)
+    
+    def advance_version(self, version):
+        """Make sure future versions are numbered after the given one"""
+        if version > self.version:
+            self.version = version
+            self._snapshot = StoreSnapshot(version, self._snapshot.sessions)
+    
+    @property
+    def is_dirty(self):
+        """True if there are changes that have not been written to disk"""
+        return self.version != self.saved_version
+    
+    def mark_clean(self, version):
+        """Record that everything up to version has been written to disk"""
+        with self._dirty_lock:
+            self.saved_version = version
+            # An edit made while the save ran keeps its later version and stays dirty
+            self.dirty = {key: changed for key, changed in self.dirty.items() if changed > version}
+    
+    def dirty_keys(self, version):
+        """Row ids with unsaved changes made up to version"""
+        with self._dirty_lock:
+            return [key for key, changed in self.dirty.items() if changed <= version]
+    
+    def sorted_keys(self, start=None, end=None):
+        """Row ids in date order, optionally limited to start <= date < end"""
+        lo = 0 if start is None else bisect.bisect_left(self._index, (start,))
+        hi = len(self._index) if end is None else bisect.bisect_left(self._index, (end,))
+        return [key for _, _, key in self._index[lo:hi]]
+    
+    def categorize(self, today):
+        """Return {category: tuple of row ids}, memoized by (today, version)"""
+        cache_key = (today, self.version)
+        if self._categories_key == cache_key:
+            return self._categories
+        
+        # Each category is a contiguous run of the sorted index
+        bounds = [0]
+        for days in (0, 1, 2, 8):
+            bounds.append(bisect.bisect_left(self._index, (today + datetime.timedelta(days=days),)))
+        bounds.append(len(self._index))
+        
+        self._categories = {
+            name: tuple(key for _, _, key in self._index[bounds[i]:bounds[i + 1]])
+            for i, name in enumerate(self.CATEGORIES)
+        }
+        self._categories_key = cache_key
+        return self._categories
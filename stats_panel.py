@@ -0,0 +1,54 @@
+import datetime
+import tkinter as tk
+from analytics import ProgressStats
+from perf import tracer
+
+class StatsPanel(tk.Toplevel):
+    """Window with completion rates per week and topic, streaks and the overdue backlog
+    
+    Stays open next to the task list and recomputes from the column view
+    whenever the store's version moves on, checked every REFRESH ms.
+    """
+    
+    REFRESH = 1000
+    
+    def __init__(self, parent, sessions, view):
+        super().__init__(parent)
+        self.sessions = sessions
+        self.view = view
+        self.shown_key = None
+        self._after = None  # id of the scheduled update_stats, cancelled when the panel closes
+        self.title("Progress Stats")
+        self.geometry("640x560")
+        
+        self.text = tk.Text(self, wrap="none", font=("Courier", 10))
+        scrollbar = tk.Scrollbar(self, orient="vertical", command=self.text.yview)
+        self.text.config(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.text.pack(fill="both", expand=True, padx=(10, 0), pady=10)
+        self.bind("<Destroy>", self._on_destroy)
+        self.update_stats()
+    
+    def _on_destroy(self, event):
+        # Children's Destroy events reach this binding too
+        if event.widget is self and self._after is not None:
+            self.after_cancel(self._after)
+            self._after = None
+    
+    def update_stats(self):
+        self._after = None
+        today = datetime.date.today()
+        key = (today, self.sessions.version)
+        if key != self.shown_key:
+            self.shown_key = key
+            with tracer.span("progress_stats", rows=len(self.sessions)):
+                report = ProgressStats.format_report(ProgressStats.compute(self.view, today))
+            if self.view.np is None:
+                report += "\n\n(NumPy is not installed; computed in pure Python)"
+            position = self.text.yview()[0]
+            self.text.config(state="normal")
+            self.text.delete("1.0", "end")
+            self.text.insert("1.0", report)
+            self.text.config(state="disabled")
+            self.text.yview_moveto(position)
+        self._after = self.after(self.REFRESH, self.update_stats)
@@ -0,0 +1,330 @@
+import os
+import sqlite3
+from csv_loader import CSVLoader
+from csv_writer import CSVWriter
+from edit_journal import EditJournal
+from lazy_notes import LazyNote, SQLiteNoteSource
+from schedule_cache import ScheduleCache
+from session import Session
+
+class ExternalChangeError(RuntimeError):
+    """Raised by a save that would overwrite changes made by another program"""
+
+def open_storage(file_path, cache=None):
+    """Return the storage backend for a schedule file (by extension) or a workspace folder"""
+    if os.path.isdir(file_path):
+        from workspace import WorkspaceStorage
+        return WorkspaceStorage(file_path)
+    if os.path.splitext(file_path)[1].lower() in SQLiteStorage.EXTENSIONS:
+        return SQLiteStorage(file_path)
+    return CSVStorage(file_path, cache)
+
+class CSVStorage:
+    """Schedule kept in a CSV file; edits are journaled until the next full rewrite
+    
+    base is the file's contents as last loaded or saved and file_key its
+    (size, mtime) at that point, so changes made by another program can be
+    detected and merged (see file_watcher.py).
+    """
+    
+    # Sessions per batch when a schedule comes from the cache
+    CACHED_BATCH = 50000
+    
+    def __init__(self, file_path, cache=None):
+        self.file_path = file_path
+        self.cache = cache  # ScheduleCache, or None to always parse
+        self.journal = None
+        self._uncached = None  # (file key, sessions, row errors) of a parse not yet cached
+        self._loaded_key = None
+        self.file_key = None
+        self.base = None
+        self.skipped_rows = []  # (row id, raw bytes) of rows that failed to parse, kept on save
+    
+    @property
+    def watch_path(self):
+        return self.file_path
+    
+    def iter_batches(self, cancel_event=None):
+        """Yield (sessions, row_errors, progress) batches, see CSVLoader.iter_batches
+        
+        An unchanged file is served from the cache in a single batch.
+        """
+        # Taken before parsing, so a change made meanwhile is still noticed
+        self._loaded_key = ScheduleCache.file_key(self.file_path)
+        self.skipped_rows = []
+        if self.cache is None:
+            for batch, batch_errors, progress in CSVLoader.iter_batches(self.file_path, cancel_event=cancel_event):
+                self.skipped_rows.extend(CSVLoader.skipped_rows(batch_errors))
+                yield batch, batch_errors, progress
+            return
+        
+        cached = self.cache.load(self.file_path)
+        if cached is not None:
+            sessions, errors = cached
+            self.skipped_rows = CSVLoader.skipped_rows(errors)
+            # Hand over in slices so the Tk thread merges them between redraws
+            items = list(sessions.items())
+            for start in range(0, len(items), self.CACHED_BATCH):
+                end = start + self.CACHED_BATCH
+                yield dict(items[start:end]), errors if start == 0 else [], min(end / len(items), 1.0)
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+            if not items:
+                yield {}, errors, 1.0
+            return
+        
+        file_key = self.cache.file_key(self.file_path)
+        parsed = {}
+        errors = []
+        for batch, batch_errors, progress in CSVLoader.iter_batches(self.file_path, cancel_event=cancel_event):
+            parsed.update(batch)
+            errors.extend(batch_errors)
+            self.skipped_rows.extend(CSVLoader.skipped_rows(batch_errors))
+            yield batch, batch_errors, progress
+        if cancel_event is None or not cancel_event.is_set():
+            self._uncached = (file_key, parsed, errors)
+    
+    @property
+    def needs_caching(self):
+        return self._uncached is not None
+    
+    def write_cache(self):
+        """Cache the last parse for the next time this file is opened"""
+        file_key, parsed, errors = self._uncached
+        self._uncached = None
+        self.cache.store(self.file_path, file_key, parsed, errors)
+    
+    def attach(self, sessions, on_threshold=None):
+        """Replay journaled edits into a loaded store, then journal new ones
+        
+        Returns True if any edits were replayed.
+        """
+        self.base = sessions.snapshot()
+        self.file_key = self._loaded_key
+        replayed = CSVLoader.replay_journal(self.file_path, sessions)
+        self.journal = EditJournal(self.file_path, on_threshold=on_threshold)
+        self.journal.attach(sessions)
+        return bool(replayed)
+    
+    def save(self, snapshot, backups=0):
+        """Atomically rewrite the CSV and drop the journal entries it now contains; returns bytes written"""
+        def move(temp_path, offsets):
+            LazyNote.replace_file(snapshot, temp_path, self.file_path, CSVWriter.HEADER.index('Notes'), offsets)
+        
+        if self.changed_externally():
+            raise ExternalChangeError(f"{self.file_path} was changed by another program")
+        size = CSVWriter.save_schedule(self.file_path, snapshot, backups, move=move,
+                                       skipped_rows=self.skipped_rows)
+        self.base = snapshot
+        self.file_key = ScheduleCache.file_key(self.file_path)
+        if self.journal is not None:
+            self.journal.compact(snapshot.version)
+        return size
+    
+    def changed_externally(self):
+        """True if the file no longer matches what was last loaded or saved"""
+        try:
+            return self.file_key is not None and ScheduleCache.file_key(self.file_path) != self.file_key
+        except OSError:
+            # Missing, e.g. half-way through another program's save; nothing to merge yet
+            return False
+    
+    def read_external(self, cancel_event=None):
+        """Parse the file as it is now; returns (file key, sessions, row errors)"""
+        file_key = ScheduleCache.file_key(self.file_path)
+        sessions = {}
+        errors = []
+        for batch, batch_errors, progress in CSVLoader.iter_batches(self.file_path, cancel_event=cancel_event):
+            sessions.update(batch)
+            errors.extend(batch_errors)
+        return file_key, sessions, errors
+    
+    def rebase(self, base, file_key, sessions, local_keys, row_errors=()):
+        """Adopt a merged external change: base is the new file contents, and the
+        journal is rewritten to hold only the rows where the store differs from it
+        
+        row_errors are those of the new file, whose unparsable rows saves now keep.
+        """
+        self.base = base
+        self.file_key = file_key
+        self.skipped_rows = CSVLoader.skipped_rows(row_errors)
+        if self.journal is not None:
+            # Old entries use the row ids of the previous file
+            self.journal.compact(sessions.version)
+            if local_keys:
+                self.journal.record(sessions, local_keys)
+    
+    def close(self):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+class SQLiteStorage:
+    """Schedule kept in a SQLite database with one row per session
+    
+    Each edit is committed straight away as a single-row UPDATE, so saving
+    has nothing left to rewrite and its cost does not depend on the size of
+    the schedule. The database runs in WAL mode so the load job can page
+    through rows on its own connection while edits commit on the Tk thread.
+    
+    Loading fetches only the start of each note: long notes stay in the
+    database as LazyNotes with a preview, read back by row id on demand, so
+    memory does not grow with the size of the notes.
+    """
+    
+    EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+    # Opening a database is already paged, there is no parse to cache
+    needs_caching = False
+    # Other programs write through SQLite's own locking, not by replacing the file
+    watch_path = None
+    # Rows fetched per page while loading
+    PAGE_SIZE = 5000
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS sessions ("
+        " id INTEGER PRIMARY KEY,"
+        " date TEXT NOT NULL,"
+        " topic TEXT NOT NULL,"
+        " suggested_tasks TEXT NOT NULL DEFAULT '',"
+        " completed INTEGER NOT NULL DEFAULT 0,"
+        " notes TEXT NOT NULL DEFAULT '')",
+        "CREATE INDEX IF NOT EXISTS sessions_date ON sessions (date)",
+        "CREATE INDEX IF NOT EXISTS sessions_status ON sessions (completed, date)",
+    )
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._connection = None  # used for edits, on the Tk thread only
+        self.notes_source = None  # SQLiteNoteSource lazy notes are read from
+        self._current = None  # the store's sessions as of the last change written
+    
+    @staticmethod
+    def connect(file_path):
+        """Open a connection in WAL mode, creating the schema if needed"""
+        connection = sqlite3.connect(file_path)
+        connection.execute("PRAGMA journal_mode=WAL")
+        with connection:
+            for statement in SQLiteStorage.SCHEMA:
+                connection.execute(statement)
+        return connection
+    
+    def iter_batches(self, cancel_event=None):
+        """Page through the rows in id order, yielding batches like CSVLoader.iter_batches"""
+        if self.notes_source is not None:
+            self.notes_source.close()
+        source = self.notes_source = SQLiteNoteSource(self.file_path)
+        threshold = LazyNote.THRESHOLD
+        connection = self.connect(self.file_path)
+        try:
+            total = connection.execute("SELECT count(*) FROM sessions").fetchone()[0] or 1
+            loaded = 0
+            last_id = -1
+            while True:
+                # Keyset paging: each page is an index range scan, however deep into the table
+                # Just enough of each note to tell whether it is long
+                rows = connection.execute(
+                    "SELECT id, date, topic, suggested_tasks, completed, substr(notes, 1, ?) FROM sessions"
+                    " WHERE id > ? ORDER BY id LIMIT ?", (threshold + 1, last_id, self.PAGE_SIZE)).fetchall()
+                if not rows:
+                    return
+                batch = {}
+                for row_id, date, topic, suggested_tasks, completed, notes in rows:
+                    if len(notes) > threshold:
+                        notes = LazyNote(source, row_id, None, notes)
+                    batch[str(row_id)] = Session(date, topic, suggested_tasks, completed, notes)
+                last_id = rows[-1][0]
+                loaded += len(rows)
+                yield batch, [], min(loaded / total, 1.0)
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+        finally:
+            connection.close()
+    
+    def attach(self, sessions, on_threshold=None):
+        """Write every subsequent change to the database as it happens
+        
+        Nothing is ever left to replay, so this always returns False.
+        """
+        self._connection = self.connect(self.file_path)
+        self._current = sessions.snapshot().sessions
+        sessions.add_listener(lambda keys: self.record(sessions, keys))
+        return False
+    
+    def in_row(self, note, key):
+        """Whether a lazy note is still read from the database row of key"""
+        source, row_id, end = note.location
+        return source is self.notes_source and row_id == int(key)
+    
+    def record(self, sessions, keys):
+        """Commit the changed sessions in one transaction; the store is then clean"""
+        before, self._current = self._current, sessions.snapshot().sessions
+        with self._connection:
+            for key in keys:
+                info = sessions.get(key)
+                old = before.get(key)
+                note = None if old is None else old.lazy_note
+                if note is not None and (info is None or info.lazy_note is not note) and self.in_row(note, key):
+                    # Earlier versions, e.g. kept for undo, still read this note from the row
+                    note.detach()
+                if info is None:
+                    self._connection.execute("DELETE FROM sessions WHERE id = ?", (int(key),))
+                    continue
+                note = info.lazy_note
+                if note is not None and self.in_row(note, key):
+                    # The notes in the row are already these
+                    cursor = self._connection.execute(
+                        "UPDATE sessions SET completed = ? WHERE id = ?", (int(info.completed), int(key)))
+                else:
+                    cursor = self._connection.execute(
+                        "UPDATE sessions SET completed = ?, notes = ? WHERE id = ?",
+                        (int(info.completed), info.notes, int(key)))
+                if cursor.rowcount == 0:
+                    self._connection.execute("INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                                             self.row_values(key, info))
+        sessions.mark_clean(sessions.version)
+    
+    def save(self, snapshot, backups=0):
+        """Edits are already committed; just fold the WAL back into the database
+        
+        Backups are not rotated: copying the database would make every save
+        cost as much as the whole file again.
+        """
+        connection = self.connect(self.file_path)
+        try:
+            connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        finally:
+            connection.close()
+        return 0
+    
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        if self.notes_source is not None:
+            self.notes_source.close()
+            self.notes_source = None
+    
+    @staticmethod
+    def row_values(key, info):
+        return (int(key), info.date_str, info.topic, info.suggested_tasks, int(info.completed), info.notes)
+    
+    @staticmethod
+    def import_csv(csv_path, db_path, cancel_event=None):
+        """Replace the database's rows with a CSV schedule; returns the CSV's row errors
+        
+        Row ids carry over from the CSV, so exporting back keeps the row order.
+        """
+        connection = SQLiteStorage.connect(db_path)
+        errors = []
+        try:
+            with connection:
+                connection.execute("DELETE FROM sessions")
+                for batch, batch_errors, progress in CSVLoader.iter_batches(csv_path, cancel_event=cancel_event):
+                    connection.executemany("INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)",
+                                           (SQLiteStorage.row_values(key, info) for key, info in batch.items()))
+                    errors.extend(batch_errors)
+                if cancel_event is not None and cancel_event.is_set():
+                    # Leaving the block with an exception rolls the import back
+                    raise InterruptedError("Import cancelled")
+        finally:
+            connection.close()
+        return errors
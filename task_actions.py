@@ -1,10 +1,14 @@
 import tkinter as tk
-from tkinter import messagebox, filedialog
-import csv
+from tkinter import messagebox, filedialog, simpledialog
 import datetime
+import os
 import threading
 import time
 from task_dialog import TaskNotesDialog
+from csv_writer import CSVWriter
+from perf import tracer
+from storage import ExternalChangeError
+from task_export import TaskExport
 
 class TaskActions:
     def __init__(self, main_app):
@@ -12,59 +16,93 @@ class TaskActions:
         self.autosave_enabled = False
         self.autosave_thread = None
         self.autosave_stop_event = threading.Event()
+        # Set on every change (and on stop) to wake the autosave thread
+        self.autosave_wakeup = threading.Event()
+        # Seconds of quiet after the last change before autosave writes
+        self.autosave_delay = 5.0
+        self.last_change = 0.0
+        # Number of <file>.backup generations kept by manual saves
+        self.backup_generations = CSVWriter.BACKUP_GENERATIONS
+        self.save_lock = threading.Lock()
+        # Journal compactions run as jobs; after a failure the next waits, longer each time
+        self.compact_job = None
+        self.compact_backoff = 0.0
+        self.compact_retry_at = 0.0
         self.selected_tasks = set()  # Track selected tasks
     
+    def loading_warning(self):
+        """Tell the user to wait and return True while the schedule is still loading
+        
+        Edits are refused until then: the storage backend only starts
+        persisting changes once the load has finished.
+        """
+        if self.main_app.is_loading:
+            messagebox.showwarning("Warning", "Please wait until the schedule has finished loading.")
+            return True
+        return False
+    
     def edit_task(self):
         """Handle editing a selected task"""
+        if self.loading_warning():
+            return
         selected = self.main_app.tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a task to edit.")
             return
         
-        # Get the date from the selected item (it's the iid)
-        date = selected[0]
+        # Get the row id from the selected item (it's the iid)
+        key = selected[0]
         
         # Check if this is a header row (should not be editable)
-        if date.startswith("header_"):
+        if key.startswith("header_"):
             messagebox.showwarning("Warning", "Cannot edit category headers.")
             return
         
-        # Check if the date exists in sessions
-        if date not in self.main_app.sessions:
+        # Check if the row exists in sessions
+        if key not in self.main_app.sessions:
             messagebox.showwarning("Warning", "Selected item is not a valid task.")
             return
         
-        task_info = self.main_app.sessions[date].copy()
-        task_info['date'] = date
-        
-        dialog = TaskNotesDialog(self.main_app, task_info)
+        session = self.main_app.sessions[key]
+        try:
+            notes = session.notes
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to read the notes: {str(e)}")
+            return
+        dialog = TaskNotesDialog(self.main_app, session, notes)
         self.main_app.wait_window(dialog)
         
         if dialog.result:
             result = dialog.result
-            self.main_app.sessions[date]['notes'] = result['notes']
-            self.main_app.sessions[date]['completed'] = result['completed']
-            self.main_app.populate_tree()
+            self.main_app.sessions.update(key, notes=result['notes'], completed=result['completed'])
+            self.main_app.main_interface.refresh_task(key)
+    
+    def undo(self):
+        """Revert the latest edit or bulk action"""
+        keys = self.main_app.history.undo()
+        if keys:
+            self.main_app.main_interface.schedule_refresh(keys)
+    
+    def redo(self):
+        """Apply the latest undone edit or bulk action again"""
+        keys = self.main_app.history.redo()
+        if keys:
+            self.main_app.main_interface.schedule_refresh(keys)
     
     def show_incomplete(self):
         """Show list of incomplete tasks scheduled today or in the past"""
         today = datetime.date.today()
-        incomplete = []
         
-        for day, info in self.main_app.sessions.items():
-            # Parse the date string to compare with today
-            try:
-                task_date = datetime.datetime.strptime(day, "%Y-%m-%d").date()
-                if task_date <= today and not info['completed']:
-                    incomplete.append(day)
-            except ValueError:
-                # Skip invalid date formats
-                continue
+        # The date index gives every row dated up to today without a full scan
+        sessions = self.main_app.sessions
+        past_keys = sessions.sorted_keys(end=today + datetime.timedelta(days=1))
+        completed = sessions.completed_keys()
+        incomplete = [sessions[key] for key in past_keys if key not in completed]
         
         if not incomplete:
             messagebox.showinfo("Complete", "All past and current sessions completed! 🎉")
         else:
-            incomplete_text = "\n".join([f"{day}: {self.main_app.sessions[day]['topic']} - {self.main_app.sessions[day].get('suggested_tasks', '')[:50]}..." for day in incomplete])
+            incomplete_text = "\n".join([f"{info.date_str}: {info.topic} - {info.suggested_tasks[:50]}..." for info in incomplete])
             messagebox.showinfo("Incomplete Sessions", f"Remaining tasks (today and past):\n\n{incomplete_text}")
     
     def save_progress(self):
@@ -72,35 +110,23 @@ class TaskActions:
         if not self.main_app.current_file:
             messagebox.showerror("Error", "No file loaded to save to.")
             return
+        if self.loading_warning():
+            # Saving now would overwrite the file with a partial schedule
+            return
             
-        try:
-            # Create backup of original file
-            backup_file = self.main_app.current_file + ".backup"
-            with open(self.main_app.current_file, 'r', encoding='utf-8') as original:
-                with open(backup_file, 'w', encoding='utf-8') as backup:
-                    backup.write(original.read())
-            
-            # Save updated data
-            with open(self.main_app.current_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['Date', 'Focus Topic', 'Suggested Tasks', 'Status', 'Notes'])
-                
-                # Sort sessions by date for consistent output
-                sorted_sessions = sorted(self.main_app.sessions.items(), key=lambda x: x[0])
-                
-                for date, info in sorted_sessions:
-                    status = "Complete" if info['completed'] else "Pending"
-                    writer.writerow([
-                        date, 
-                        info['topic'], 
-                        info.get('suggested_tasks', ''),
-                        status,
-                        info.get('notes', '')
-                    ])
-            
-            messagebox.showinfo("Success", f"Progress saved to {self.main_app.current_file}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to save: {str(e)}")
+        file_path = self.main_app.current_file
+        # Saves can't be cancelled half-way; the job only keeps the window responsive
+        self.main_app.jobs.submit("Saving...", lambda job: self.write_schedule(self.backup_generations, "save_progress"),
+                                  on_done=lambda result: messagebox.showinfo("Success", f"Progress saved to {file_path}"),
+                                  on_error=self.on_save_error, cancellable=False)
+    
+    def on_save_error(self, error):
+        if isinstance(error, ExternalChangeError):
+            messagebox.showwarning("File Changed", "The file was changed by another program. "
+                                   "Its changes are merged in first; save again afterwards.")
+            self.main_app.check_external_changes()
+            return
+        messagebox.showerror("Error", f"Failed to save: {str(error)}")
     
     def toggle_autosave(self):
         """Toggle autosave functionality"""
@@ -114,71 +140,191 @@ class TaskActions:
         if not self.main_app.current_file:
             messagebox.showerror("Error", "No file loaded for autosave.")
             return
+        if self.loading_warning():
+            return
             
         self.autosave_enabled = True
         self.autosave_stop_event.clear()
+        self.autosave_wakeup.clear()
         self.autosave_thread = threading.Thread(target=self._autosave_worker, daemon=True)
         self.autosave_thread.start()
         self.main_app.main_interface.update_autosave_button(True)
-        messagebox.showinfo("Autosave", "Autosave enabled - saving every 30 seconds")
+        messagebox.showinfo("Autosave", f"Autosave enabled - saving {self.autosave_delay:g} seconds after the last change")
     
-    def stop_autosave(self):
-        """Stop autosave thread"""
+    def stop_autosave(self, show_message=True):
+        """Stop autosave thread and flush any pending changes"""
         self.autosave_enabled = False
         self.autosave_stop_event.set()
+        self.autosave_wakeup.set()
         if self.autosave_thread:
-            self.autosave_thread.join(timeout=1)
+            self.autosave_thread.join()
+            self.autosave_thread = None
+        
+        # Don't leave changes waiting for a debounce that will never fire
+        if self.main_app.sessions.is_dirty:
+            self._write_autosave()
+        
         self.main_app.main_interface.update_autosave_button(False)
-        messagebox.showinfo("Autosave", "Autosave disabled")
+        if show_message:
+            messagebox.showinfo("Autosave", "Autosave disabled")
+    
+    def on_sessions_changed(self, keys):
+        """Store listener: restart the autosave debounce"""
+        self.last_change = time.monotonic()
+        if self.autosave_enabled:
+            self.autosave_wakeup.set()
     
     def _autosave_worker(self):
-        """Background thread for autosave functionality"""
-        while not self.autosave_stop_event.is_set():
-            time.sleep(30)  # Wait 30 seconds
-            if not self.autosave_stop_event.is_set():
-                try:
-                    # Save without showing message to avoid interrupting user
-                    with open(self.main_app.current_file, 'w', newline='', encoding='utf-8') as f:
-                        writer = csv.writer(f)
-                        writer.writerow(['Date', 'Focus Topic', 'Suggested Tasks', 'Status', 'Notes'])
-                        
-                        # Sort sessions by date for consistent output
-                        sorted_sessions = sorted(self.main_app.sessions.items(), key=lambda x: x[0])
-                        
-                        for date, info in sorted_sessions:
-                            status = "Complete" if info['completed'] else "Pending"
-                            writer.writerow([
-                                date, 
-                                info['topic'], 
-                                info.get('suggested_tasks', ''),
-                                status,
-                                info.get('notes', '')
-                            ])
-                except Exception as e:
-                    # Log error but don't show message to avoid interrupting user
-                    print(f"Autosave error: {str(e)}")
-    
-    def generate_export_content(self, task_dates, title="Jacob's Selected Pre-Class Study Tasks"):
-        """Generate export content for given task dates"""
-        export_content = f"### {title}\n\n"
-        
-        # Sort tasks by date
-        task_dates.sort()
-        
-        for date in task_dates:
-            if date in self.main_app.sessions:
-                info = self.main_app.sessions[date]
-                export_content += f"[{date}] - {info['topic']}\n"
-                export_content += f"• Task: {info.get('suggested_tasks', '')}\n"
-                
-                if info.get('notes'):
-                    export_content += f"• Notes: {info['notes']}\n"
-                else:
-                    export_content += "• Notes: \n"
-                
-                export_content += "\n"
-        
-        return export_content
+        """Background thread: write once changes have been quiet for autosave_delay seconds"""
+        while True:
+            self.autosave_wakeup.wait()
+            if self.autosave_stop_event.is_set():
+                return
+            self.autosave_wakeup.clear()
+            
+            # Debounce: keep waiting while changes keep arriving
+            while True:
+                remaining = self.last_change + self.autosave_delay - time.monotonic()
+                if remaining <= 0:
+                    break
+                if self.autosave_stop_event.wait(remaining):
+                    return
+            
+            # Nothing to do if a manual save already caught up
+            if self.main_app.sessions.is_dirty:
+                self._write_autosave()
+    
+    def compact_journal(self):
+        """Journal callback: fold a journal that grew past its threshold into the CSV on a job thread"""
+        if self.main_app.is_loading or time.monotonic() < self.compact_retry_at:
+            return
+        if self.compact_job is not None and not self.compact_job.finished:
+            return
+        self.compact_job = self.main_app.jobs.submit("Compacting journal...", lambda job: self.write_schedule(),
+                                                     on_done=self.on_journal_compacted,
+                                                     on_error=self.on_compact_error, cancellable=False)
+    
+    def on_journal_compacted(self, result):
+        self.compact_backoff = 0.0
+        self.compact_retry_at = 0.0
+    
+    def on_compact_error(self, error):
+        """Back off instead of retrying the failed write on every edit"""
+        self.compact_backoff = min(max(self.compact_backoff * 2, 5.0), 300.0)
+        self.compact_retry_at = time.monotonic() + self.compact_backoff
+        print(f"Journal compaction error (retrying in {self.compact_backoff:g}s): {str(error)}")
+    
+    def write_schedule(self, backups=0, operation="autosave"):
+        """Persist the schedule through the storage backend, then mark it clean"""
+        # One writer at a time, so an older snapshot can never land after a newer one
+        with self.save_lock, tracer.span(operation) as span:
+            # Serialize an immutable snapshot; the Tk thread can keep editing meanwhile
+            snapshot = self.main_app.sessions.snapshot()
+            written = self.main_app.storage.save(snapshot, backups)
+            self.main_app.sessions.mark_clean(snapshot.version)
+            span.set(rows=len(snapshot), bytes=written)
+    
+    def _write_autosave(self):
+        """Write the schedule without showing a message"""
+        try:
+            # Autosaves skip backup rotation so they don't push out manual-save backups
+            self.write_schedule()
+        except Exception as e:
+            # Log error but don't show message to avoid interrupting user
+            print(f"Autosave error: {str(e)}")
+    
+    def iter_export_chunks(self, task_keys, title=TaskExport.SELECTED_TITLE):
+        """Yield export content for given task row ids, one task at a time"""
+        # Read from one snapshot so a long export sees a consistent schedule
+        return TaskExport.iter_chunks(self.main_app.sessions.snapshot(), task_keys, title)
+    
+    def generate_export_content(self, task_keys, title=TaskExport.SELECTED_TITLE):
+        """Generate export content for given task dates as a single string"""
+        return "".join(self.iter_export_chunks(task_keys, title))
+    
+    def write_export(self, export_file, task_keys, title=TaskExport.SELECTED_TITLE, job=None):
+        """Stream the export straight to a file without building it in memory
+        
+        With a job, progress is reported as tasks are written and a cancelled
+        export removes its partial file. Returns False if it was cancelled.
+        """
+        with tracer.span("export_file", rows=len(task_keys)) as span:
+            with open(export_file, 'w', encoding='utf-8') as f:
+                completed = TaskExport.write(f, self.main_app.sessions.snapshot(), task_keys, title, job)
+                span.set(bytes=f.tell())
+            if not completed:
+                span.set(cancelled=True)
+                os.remove(export_file)
+            return completed
+    
+    def start_file_export(self, export_file, task_keys, title, label):
+        """Write an export in the background and report when it is done"""
+        def on_done(completed):
+            if completed:
+                messagebox.showinfo("Success", f"{label} exported to {export_file}")
+        
+        self.main_app.jobs.submit("Exporting...", lambda job: self.write_export(export_file, task_keys, title, job),
+                                  on_done=on_done,
+                                  on_error=lambda e: messagebox.showerror("Error", f"Failed to export: {str(e)}"))
+    
+    def clipboard_export_content(self, task_keys, title=TaskExport.SELECTED_TITLE):
+        """Build export content for the clipboard, spilling to a temp file past its threshold
+        
+        Returns (content, None, tasks) for the clipboard, or (None, temp file
+        path, tasks) once the export grew beyond the clipboard's
+        file_threshold characters, so a huge export is never held in memory.
+        """
+        threshold = self.main_app.clipboard.file_threshold
+        chunks = []
+        size = 0
+        tasks = -1  # the first chunk is the title
+        f = None
+        with tracer.span("export_clipboard", rows=len(task_keys)) as span:
+            try:
+                for chunk in self.iter_export_chunks(task_keys, title):
+                    tasks += 1
+                    size += len(chunk)
+                    if f is not None:
+                        f.write(chunk)
+                        continue
+                    chunks.append(chunk)
+                    if size > threshold:
+                        f = self.main_app.clipboard.temp_file()
+                        f.writelines(chunks)
+                        chunks = []
+            finally:
+                if f is not None:
+                    f.close()
+            span.set(characters=size, temp_file=f is not None)
+        if f is not None:
+            return None, f.name, tasks
+        return "".join(chunks), None, tasks
+    
+    def copy_export_to_clipboard(self, task_keys, title, label):
+        """Build an export in the background, then copy it to the clipboard on the Tk thread"""
+        self.main_app.jobs.submit("Exporting...", lambda job: self.clipboard_export_content(task_keys, title),
+                                  on_done=lambda result: self.finish_clipboard_export(result, label),
+                                  on_error=lambda e: messagebox.showerror("Error", f"Failed to export: {str(e)}"))
+    
+    def finish_clipboard_export(self, result, label):
+        """Copy built export content, or point to the temp file it was written to"""
+        export_content, temp_path, exported = result
+        
+        if temp_path is not None:
+            messagebox.showinfo("Export Written to File",
+                                f"The export is larger than {self.main_app.clipboard.file_threshold:,} characters, "
+                                f"so it was written to a file instead of the clipboard:\n\n{temp_path}\n\n"
+                                f"Exported {exported} tasks.")
+            return
+        
+        # Copy to clipboard
+        try:
+            self.main_app.clipboard.copy(export_content)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export: {str(e)}")
+            return
+        
+        messagebox.showinfo("Success", f"{label} copied to clipboard!\n\nExported {exported} tasks.")
     
     def export_selected_to_clipboard(self):
         """Export selected tasks to clipboard (default)"""
@@ -187,23 +333,18 @@ class TaskActions:
             messagebox.showwarning("Warning", "Please select tasks to export.")
             return
         
-        # Filter out header rows and get only valid task dates
-        task_dates = []
+        # Filter out header rows and get only valid task row ids
+        task_keys = []
         for item in selected:
             if not item.startswith("header_"):
-                task_dates.append(item)
+                task_keys.append(item)
         
-        if not task_dates:
+        if not task_keys:
             messagebox.showwarning("Warning", "Please select valid tasks to export (not category headers).")
             return
         
         try:
-            export_content = self.generate_export_content(task_dates)
-            
-            # Copy to clipboard
-            import pyperclip
-            pyperclip.copy(export_content)
-            messagebox.showinfo("Success", f"Selected tasks copied to clipboard!\n\nExported {len(task_dates)} tasks.")
+            self.copy_export_to_clipboard(task_keys, TaskExport.SELECTED_TITLE, "Selected tasks")
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {str(e)}")
@@ -215,19 +356,17 @@ class TaskActions:
             messagebox.showwarning("Warning", "Please select tasks to export.")
             return
         
-        # Filter out header rows and get only valid task dates
-        task_dates = []
+        # Filter out header rows and get only valid task row ids
+        task_keys = []
         for item in selected:
             if not item.startswith("header_"):
-                task_dates.append(item)
+                task_keys.append(item)
         
-        if not task_dates:
+        if not task_keys:
             messagebox.showwarning("Warning", "Please select valid tasks to export (not category headers).")
             return
         
         try:
-            export_content = self.generate_export_content(task_dates)
-            
             # Ask user where to save
             export_file = filedialog.asksaveasfilename(
                 title="Export Selected Tasks",
@@ -236,10 +375,7 @@ class TaskActions:
             )
             
             if export_file:
-                with open(export_file, 'w', encoding='utf-8') as f:
-                    f.write(export_content)
-                
-                messagebox.showinfo("Success", f"Selected tasks exported to {export_file}")
+                self.start_file_export(export_file, task_keys, TaskExport.SELECTED_TITLE, "Selected tasks")
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {str(e)}")
@@ -247,13 +383,8 @@ class TaskActions:
     def export_all_to_clipboard(self):
         """Export all tasks to clipboard"""
         try:
-            task_dates = list(self.main_app.sessions.keys())
-            export_content = self.generate_export_content(task_dates, "Jacob's Complete Pre-Class Study Tasks")
-            
-            # Copy to clipboard
-            import pyperclip
-            pyperclip.copy(export_content)
-            messagebox.showinfo("Success", f"All tasks copied to clipboard!\n\nExported {len(task_dates)} tasks.")
+            task_keys = list(self.main_app.sessions.keys())
+            self.copy_export_to_clipboard(task_keys, TaskExport.ALL_TITLE, "All tasks")
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {str(e)}")
@@ -261,8 +392,7 @@ class TaskActions:
     def export_all_to_file(self):
         """Export all tasks to file"""
         try:
-            task_dates = list(self.main_app.sessions.keys())
-            export_content = self.generate_export_content(task_dates, "Jacob's Complete Pre-Class Study Tasks")
+            task_keys = list(self.main_app.sessions.keys())
             
             # Ask user where to save
             export_file = filedialog.asksaveasfilename(
@@ -272,49 +402,114 @@ class TaskActions:
             )
             
             if export_file:
-                with open(export_file, 'w', encoding='utf-8') as f:
-                    f.write(export_content)
-                
-                messagebox.showinfo("Success", f"All tasks exported to {export_file}")
+                self.start_file_export(export_file, task_keys, TaskExport.ALL_TITLE, "All tasks")
                     
         except Exception as e:
             messagebox.showerror("Error", f"Failed to export: {str(e)}")
     
+    def export_all_to_csv(self):
+        """Export the whole schedule as a CSV file, e.g. from a database"""
+        export_file = filedialog.asksaveasfilename(
+            title="Export All Tasks to CSV",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("All files", "*.*")]
+        )
+        if not export_file:
+            return
+        
+        snapshot = self.main_app.sessions.snapshot()
+        
+        def export(job):
+            with tracer.span("export_csv", rows=len(snapshot)) as span:
+                span.set(bytes=CSVWriter.save_schedule(export_file, snapshot, backups=0))
+        
+        self.main_app.jobs.submit("Exporting...", export,
+                                  on_done=lambda result: messagebox.showinfo("Success", f"All tasks exported to {export_file}"),
+                                  on_error=lambda e: messagebox.showerror("Error", f"Failed to export: {str(e)}"),
+                                  cancellable=False)
+    
+    def selected_task_keys(self):
+        """Row ids of the selected tasks, leaving out category headers"""
+        sessions = self.main_app.sessions
+        return [key for key in self.main_app.tree.selection() if not key.startswith("header_") and key in sessions]
+    
+    def set_selection_completed(self, completed):
+        """Mark every selected task complete (or pending) as one change"""
+        if self.loading_warning():
+            return
+        keys = self.selected_task_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select tasks to update (not category headers).")
+            return
+        
+        sessions = self.main_app.sessions
+        changed = [key for key in keys if sessions[key].completed != completed]
+        if changed:
+            # One store change: one journal entry, one autosave debounce and one redraw
+            sessions.update_many({key: (None, completed) for key in changed})
+            self.main_app.main_interface.schedule_refresh(changed)
+    
+    def append_note_to_selection(self):
+        """Append a line to the notes of every selected task"""
+        if self.loading_warning():
+            return
+        keys = self.selected_task_keys()
+        if not keys:
+            messagebox.showwarning("Warning", "Please select tasks to add a note to (not category headers).")
+            return
+        
+        text = simpledialog.askstring("Append Note", f"Note to append to {len(keys)} task(s):", parent=self.main_app)
+        if not text:
+            return
+        
+        sessions = self.main_app.sessions
+        changes = {}
+        for key in keys:
+            info = sessions[key]
+            try:
+                notes = info.notes
+            except (OSError, ValueError) as e:
+                # All or nothing, so the bulk action stays one change
+                messagebox.showerror("Error", f"Failed to read the notes of [{info.date_str}] {info.topic}: "
+                                              f"{str(e)}\n\nNo notes were changed.")
+                return
+            changes[key] = (f"{notes}\n{text}" if notes else text, None)
+        sessions.update_many(changes)
+        self.main_app.main_interface.schedule_refresh(keys)
+    
     def toggle_selection(self):
-        """Toggle selection of the currently selected task"""
+        """Toggle export selection of the selected tasks
+        
+        If every one of them is already marked they are all unmarked,
+        otherwise they are all marked.
+        """
         selected = self.main_app.tree.selection()
         if not selected:
             messagebox.showwarning("Warning", "Please select a task to toggle selection.")
             return
         
-        # Get the first selected item (for simplicity, handle one at a time)
-        item = selected[0]
-        
-        # Check if this is a header row
-        if item.startswith("header_"):
+        keys = self.selected_task_keys()
+        if not keys:
             messagebox.showwarning("Warning", "Cannot select category headers.")
             return
         
-        # Check if the date exists in sessions
-        if item not in self.main_app.sessions:
-            messagebox.showwarning("Warning", "Selected item is not a valid task.")
-            return
-        
-        # Toggle selection
-        if item in self.selected_tasks:
-            self.selected_tasks.remove(item)
-            # Update tree to show as unselected
-            self.main_app.tree.item(item, tags=())
+        marked = not self.selected_tasks.issuperset(keys)
+        if marked:
+            self.selected_tasks.update(keys)
         else:
-            self.selected_tasks.add(item)
-            # Update tree to show as selected
-            self.main_app.tree.item(item, tags=("selected",))
+            self.selected_tasks.difference_update(keys)
         
-        # Update the tree to reflect selection
-        self.main_app.main_interface.populate_tree()
+        # Only the toggled rows change, redrawn together
+        self.main_app.main_interface.schedule_refresh(keys)
         
         # Show selection status
-        if item in self.selected_tasks:
-            messagebox.showinfo("Selection", f"Task for {item} marked for export")
+        if len(keys) == 1:
+            date_str = self.main_app.sessions[keys[0]].date_str
+            if marked:
+                messagebox.showinfo("Selection", f"Task for {date_str} marked for export")
+            else:
+                messagebox.showinfo("Selection", f"Task for {date_str} removed from export")
+        elif marked:
+            messagebox.showinfo("Selection", f"{len(keys)} tasks marked for export")
         else:
-            messagebox.showinfo("Selection", f"Task for {item} removed from export") 
\ No newline at end of file
+            messagebox.showinfo("Selection", f"{len(keys)} tasks removed from export")
@@ -1,9 +1,12 @@
 import tkinter as tk
 
 class TaskNotesDialog(tk.Toplevel):
-    def __init__(self, parent, task_info):
+    def __init__(self, parent, session, notes):
+        # notes is read by the caller: reading a lazy note can fail, which must
+        # happen before this window exists and holds the grab
         super().__init__(parent)
-        self.task_info = task_info
+        self.session = session
+        self.notes = notes
         self.result = None
         self.setup_ui()
         
@@ -25,18 +28,18 @@ class TaskNotesDialog(tk.Toplevel):
         top_frame.pack(fill="x", pady=(0, 10))
         
         # Task info
-        tk.Label(top_frame, text=f"Date: {self.task_info['date']}", font=("Arial", 12, "bold")).pack(anchor="w")
-        tk.Label(top_frame, text=f"Topic: {self.task_info['topic']}", font=("Arial", 10)).pack(anchor="w", pady=(0, 5))
+        tk.Label(top_frame, text=f"Date: {self.session.date_str}", font=("Arial", 12, "bold")).pack(anchor="w")
+        tk.Label(top_frame, text=f"Topic: {self.session.topic}", font=("Arial", 10)).pack(anchor="w", pady=(0, 5))
         
         # Show suggested tasks if available
-        if self.task_info.get('suggested_tasks'):
+        if self.session.suggested_tasks:
             suggested_frame = tk.Frame(top_frame)
             suggested_frame.pack(fill="x", pady=(0, 10))
             
             tk.Label(suggested_frame, text="Suggested Tasks:", font=("Arial", 10, "bold")).pack(anchor="w")
             suggested_text = tk.Text(suggested_frame, height=3, width=60, wrap="word")
             suggested_text.pack(fill="x", pady=(2, 0))
-            suggested_text.insert("1.0", self.task_info['suggested_tasks'])
+            suggested_text.insert("1.0", self.session.suggested_tasks)
             suggested_text.config(state="disabled")  # Make it read-only
         
         # Middle section for notes
@@ -49,8 +52,8 @@ class TaskNotesDialog(tk.Toplevel):
         self.notes_text.pack(fill="both", expand=True, pady=(5, 0))
         
         # Load existing notes if any
-        if self.task_info.get('notes'):
-            self.notes_text.insert("1.0", self.task_info['notes'])
+        if self.notes:
+            self.notes_text.insert("1.0", self.notes)
         
         # Bottom section for buttons
         bottom_frame = tk.Frame(container)
@@ -90,7 +93,7 @@ class TaskNotesDialog(tk.Toplevel):
         self.result = {
             'action': 'save_notes',
             'notes': notes,
-            'completed': self.task_info.get('completed', False)
+            'completed': self.session.completed
         }
         self.destroy()
     
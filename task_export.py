@@ -0,0 +1,39 @@
+class TaskExport:
+    """Plain-text export of tasks, shared by the GUI and the command line"""
+    
+    SELECTED_TITLE = "Jacob's Selected Pre-Class Study Tasks"
+    ALL_TITLE = "Jacob's Complete Pre-Class Study Tasks"
+    INCOMPLETE_TITLE = "Jacob's Incomplete Pre-Class Study Tasks"
+    
+    @staticmethod
+    def iter_chunks(sessions, task_keys, title=SELECTED_TITLE):
+        """Yield export content for the given row ids of sessions, one task at a time
+        
+        sessions should be a snapshot, so a long export sees a consistent schedule.
+        """
+        yield f"### {title}\n\n"
+        
+        # Sort tasks by date, keeping file order within a day
+        for key in sessions.date_order(task_keys):
+            info = sessions.get(key)
+            if info is not None:
+                yield (f"[{info.date_str}] - {info.topic}\n"
+                       f"• Task: {info.suggested_tasks}\n"
+                       f"• Notes: {info.notes}\n"
+                       "\n")
+    
+    @staticmethod
+    def write(f, sessions, task_keys, title=SELECTED_TITLE, job=None):
+        """Stream the export to an open text file
+        
+        With a job, progress is reported as tasks are written. Returns False
+        if the job was cancelled part-way.
+        """
+        total = max(len(task_keys), 1)
+        for written, chunk in enumerate(TaskExport.iter_chunks(sessions, task_keys, title)):
+            f.write(chunk)
+            if job is not None and written % 1000 == 0:
+                if job.cancelled:
+                    return False
+                job.report(written / total)
+        return True
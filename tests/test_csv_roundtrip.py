@@ -0,0 +1,65 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionStore
+from storage import CSVStorage
+
+SCHEDULE = (
+    "Date,Focus Topic,Suggested Tasks,Status,Notes\r\n"
+    "2025-01-01 (Wed),Algebra,Read chapter 1,Pending,\r\n"
+    "2025-01-01\r\n"
+    "2025-01-02 (Thu),Geometry,\"Draw, then prove\",Pending,\"two\r\nlines\"\r\n"
+    "2025-01-03\r\n"
+)
+
+class BadRowRoundTripTest(unittest.TestCase):
+    """Rows the loader can't parse must survive a load -> save round trip"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "schedule.csv")
+        with open(self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(SCHEDULE)
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def load(self):
+        storage = CSVStorage(self.path)
+        sessions = SessionStore()
+        errors = []
+        for batch, batch_errors, progress in storage.iter_batches():
+            sessions.add_many(batch)
+            errors.extend(batch_errors)
+        storage.attach(sessions)
+        return storage, sessions, errors
+    
+    def test_save_keeps_unparsable_rows_in_place(self):
+        storage, sessions, errors = self.load()
+        self.assertEqual(len(sessions), 2)
+        self.assertEqual([line for line, message, row_id, raw in errors], [3, 6])
+        
+        sessions.update("1", completed=True)
+        storage.save(sessions.snapshot())
+        storage.close()
+        
+        with open(self.path, "rb") as f:
+            lines = f.read().split(b"\r\n")
+        self.assertEqual(lines[2], b"2025-01-01")
+        self.assertEqual(lines[-2], b"2025-01-03")
+        self.assertIn(b"Geometry", lines[3])
+        
+        storage, reloaded, errors = self.load()
+        storage.close()
+        self.assertEqual(len(errors), 2)
+        self.assertTrue(reloaded["1"].completed)
+        self.assertEqual(reloaded["1"].notes, "two\nlines")
+        self.assertEqual(reloaded["0"].topic, "Algebra")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_history import EditHistory
+from session import Session
+from session_store import SessionStore
+
+class EditHistoryTest(unittest.TestCase):
+    """Undo and redo put recorded versions back as ordinary store changes"""
+    
+    def setUp(self):
+        self.original = {str(i): Session(f"2025-01-0{i + 1}", f"Topic {i}") for i in range(3)}
+        self.sessions = SessionStore(self.original)
+        self.history = EditHistory()
+        self.history.attach(self.sessions)
+        self.changes = []
+        self.sessions.add_listener(lambda keys: self.changes.append(set(keys)))
+    
+    def test_undo_and_redo_a_bulk_change(self):
+        self.sessions.apply_changes({'0': self.original['0'].replace(completed=True),
+                                     '3': Session("2025-01-04", "Added")}, ['2'])
+        edited = self.sessions.snapshot()
+        
+        self.assertEqual(set(self.history.undo()), {'0', '2', '3'})
+        for key, info in self.original.items():
+            self.assertIs(self.sessions[key], info)
+        self.assertNotIn('3', self.sessions)
+        self.assertTrue(self.history.can_redo)
+        
+        self.assertEqual(set(self.history.redo()), {'0', '2', '3'})
+        self.assertIs(self.sessions['0'], edited.get('0'))
+        self.assertIs(self.sessions['3'], edited.get('3'))
+        self.assertNotIn('2', self.sessions)
+        self.assertFalse(self.history.can_redo)
+    
+    def test_restores_are_store_changes_but_not_steps(self):
+        self.sessions.update('1', notes="First")
+        self.sessions.update('1', notes="Second")
+        version = self.sessions.version
+        
+        self.history.undo()
+        self.assertEqual(self.sessions['1'].notes, "First")
+        # Seen by listeners (journal, autosave, redraw) like any edit
+        self.assertEqual(self.changes[-1], {'1'})
+        self.assertGreater(self.sessions.version, version)
+        self.assertTrue(self.sessions.is_dirty)
+        
+        self.history.undo()
+        self.assertIs(self.sessions['1'], self.original['1'])
+        self.assertFalse(self.history.can_undo)
+        self.assertEqual(self.history.undo(), ())
+    
+    def test_new_edit_clears_redo(self):
+        self.sessions.update('0', completed=True)
+        self.history.undo()
+        self.sessions.update('2', notes="Something else")
+        
+        self.assertFalse(self.history.can_redo)
+        self.assertEqual(self.history.redo(), ())
+        self.assertFalse(self.sessions['0'].completed)
+
+if __name__ == '__main__':
+    unittest.main()
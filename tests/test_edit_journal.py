@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_journal import EditJournal
+from session import Session
+from session_store import SessionStore
+
+def schedule():
+    return SessionStore({
+        '0': Session("2025-01-01", "Algebra"),
+        '1': Session("2025-01-01", "Geometry"),
+        '2': Session("2025-01-02", "Calculus"),
+    })
+
+class EditJournalTest(unittest.TestCase):
+    """Journaled edits replay into a fresh load and compact by store version"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, "schedule.csv")
+        self.journal = EditJournal(self.file_path)
+    
+    def tearDown(self):
+        self.journal.close()
+        shutil.rmtree(self.directory)
+    
+    def write_lines(self, entries, torn=""):
+        with open(self.journal.path, 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.write(torn)
+    
+    def test_replay_applies_recorded_edits(self):
+        sessions = schedule()
+        self.journal.attach(sessions)
+        sessions.update('1', notes="Proofs", completed=True)
+        del sessions['2']
+        self.journal.close()
+        
+        reloaded = schedule()
+        self.assertEqual(EditJournal(self.file_path).replay_into(reloaded), 2)
+        self.assertTrue(reloaded['1'].completed)
+        self.assertEqual(reloaded['1'].notes, "Proofs")
+        self.assertNotIn('2', reloaded)
+        self.assertFalse(reloaded['0'].completed)
+        # New edits are numbered after the replayed ones
+        self.assertEqual(reloaded.version, sessions.version)
+    
+    def test_compact_keeps_entries_after_the_saved_version(self):
+        sessions = schedule()
+        self.journal.attach(sessions)
+        sessions.update('0', completed=True)
+        saved = sessions.version
+        sessions.update('2', notes="After the save")
+        
+        self.journal.compact(saved)
+        self.assertEqual([entry['id'] for entry in self.journal.read()], ['2'])
+        
+        self.journal.compact(sessions.version)
+        self.assertFalse(os.path.exists(self.journal.path))
+    
+    def test_legacy_entries_are_keyed_by_date(self):
+        # Written before row ids: no id, no version, and a torn last line from a crash
+        self.write_lines([{'date': "2025-01-01", 'topic': "Algebra", 'suggested_tasks': "",
+                           'completed': True, 'notes': "Old journal"}], torn='{"date": "2025-01-0')
+        sessions = schedule()
+        
+        self.assertEqual(self.journal.replay_into(sessions), 1)
+        self.assertTrue(sessions['0'].completed)
+        self.assertEqual(sessions['0'].notes, "Old journal")
+        self.assertFalse(sessions['1'].completed)
+        
+        # Version 0, so any save contains it
+        self.journal.compact(0)
+        self.assertFalse(os.path.exists(self.journal.path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from persistent_map import PersistentMap
+
+class PersistentMapTest(unittest.TestCase):
+    """Every change returns a new map and leaves earlier versions as they were"""
+    
+    def setUp(self):
+        self.base = PersistentMap({str(i): i for i in range(1000)})
+    
+    def test_set_leaves_old_version_untouched(self):
+        changed = self.base.set('5', 'five').set('new', -1)
+        
+        self.assertEqual(changed['5'], 'five')
+        self.assertEqual(changed['new'], -1)
+        self.assertEqual(len(changed), 1001)
+        self.assertEqual(self.base['5'], 5)
+        self.assertNotIn('new', self.base)
+        self.assertEqual(len(self.base), 1000)
+    
+    def test_delete_leaves_old_version_untouched(self):
+        smaller = self.base.delete('7')
+        
+        self.assertNotIn('7', smaller)
+        self.assertIsNone(smaller.get('7'))
+        self.assertEqual(len(smaller), 999)
+        self.assertEqual(self.base['7'], 7)
+        self.assertEqual(len(self.base), 1000)
+        with self.assertRaises(KeyError):
+            smaller.delete('7')
+    
+    def test_keys_sharing_a_bucket(self):
+        # Equal low 15 bits of the hash: same path down the trie, same bucket
+        first, second = 3, 3 + 2 ** 15
+        one = PersistentMap().set(first, 'a')
+        two = one.set(second, 'b')
+        without_first = two.delete(first)
+        
+        self.assertEqual(dict(two.items()), {first: 'a', second: 'b'})
+        self.assertEqual(dict(one.items()), {first: 'a'})
+        self.assertEqual(dict(without_first.items()), {second: 'b'})
+    
+    def test_update_matches_single_sets(self):
+        changes = {str(i): -i for i in range(500, 1500)}
+        updated = self.base.update(changes)
+        one_by_one = self.base
+        for key, value in changes.items():
+            one_by_one = one_by_one.set(key, value)
+        
+        self.assertEqual(dict(updated.items()), dict(one_by_one.items()))
+        self.assertEqual(len(updated), 1500)
+        self.assertEqual(dict(self.base.items()), {str(i): i for i in range(1000)})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from schedule_cache import ScheduleCache
+from storage import CSVStorage
+
+HEADER = "Date,Focus Topic,Suggested Tasks,Status,Notes\r\n"
+ROWS = "2025-01-01,Algebra,,Pending,\r\n2025-01-02,Geometry,,Complete," + "long note " * 20 + "\r\n"
+
+class ScheduleCacheTest(unittest.TestCase):
+    """A cached parse is served only while the file still holds what was parsed"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "schedule.csv")
+        self.write(ROWS)
+        self.cache = ScheduleCache(os.path.join(self.directory, "cache"))
+        self.hashed = 0
+        content_hash = self.cache.content_hash
+        def counting_hash(path):
+            self.hashed += 1
+            return content_hash(path)
+        self.cache.content_hash = counting_hash
+        
+        storage = CSVStorage(self.path, self.cache)
+        for batch in storage.iter_batches():
+            pass
+        storage.write_cache()
+        self.hashed = 0
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def write(self, rows, path=None):
+        with open(path or self.path, "w", encoding="utf-8", newline="") as f:
+            f.write(HEADER + rows)
+    
+    def set_mtime(self, mtime_ns, path=None):
+        os.utime(path or self.path, ns=(mtime_ns, mtime_ns))
+    
+    def replace_file(self, rows):
+        """Swap in a new file (new inode) with the old mtime"""
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        temp_path = self.path + ".new"
+        self.write(rows, temp_path)
+        self.set_mtime(mtime_ns, temp_path)
+        os.replace(temp_path, self.path)
+    
+    def test_unchanged_file_hits_without_hashing(self):
+        sessions, errors = self.cache.load(self.path)
+        self.assertEqual(self.hashed, 0)
+        self.assertEqual(sorted(sessions), ['0', '1'])
+        self.assertTrue(sessions['1'].completed)
+        self.assertEqual(sessions['1'].notes, "long note " * 20)
+    
+    def test_size_change_invalidates(self):
+        self.write(ROWS + "2025-01-03,Calculus,,Pending,\r\n")
+        self.assertIsNone(self.cache.load(self.path))
+        self.assertEqual(self.hashed, 0)
+        self.write(ROWS)
+        # The entry is gone, not just skipped
+        self.assertIsNone(self.cache.load(self.path))
+    
+    def test_touched_file_falls_back_to_the_hash(self):
+        self.set_mtime(os.stat(self.path).st_mtime_ns + 10 ** 9)
+        self.assertIsNotNone(self.cache.load(self.path))
+        self.assertEqual(self.hashed, 1)
+        # The new mtime is remembered, so the next open skips the hash
+        self.assertIsNotNone(self.cache.load(self.path))
+        self.assertEqual(self.hashed, 1)
+    
+    def test_edit_of_the_same_size_misses(self):
+        self.write(ROWS.replace("Pending", "Pendinx"))
+        self.set_mtime(os.stat(self.path).st_mtime_ns + 10 ** 9)
+        self.assertIsNone(self.cache.load(self.path))
+        self.assertEqual(self.hashed, 1)
+    
+    def test_new_inode_is_hashed(self):
+        # Same size and mtime, but another file: only the hash can tell
+        self.replace_file(ROWS.replace("Algebra", "Algebrx"))
+        self.assertIsNone(self.cache.load(self.path))
+        self.assertEqual(self.hashed, 1)
+    
+    def test_new_inode_with_the_same_contents_hits(self):
+        self.replace_file(ROWS)
+        self.assertIsNotNone(self.cache.load(self.path))
+        self.assertEqual(self.hashed, 1)
+
+if __name__ == '__main__':
+    unittest.main()
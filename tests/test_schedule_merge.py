@@ -0,0 +1,76 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_watcher import ScheduleMerge
+from session import Session
+from session_store import SessionStore
+from storage import CSVStorage
+
+class MergeIdsTest(unittest.TestCase):
+    """Row ids held elsewhere (e.g. the selection) must follow rows re-keyed by a merge"""
+    
+    def test_ids_follow_shifted_rows(self):
+        base = {str(i): Session(f"2025-01-0{i + 1}", "Algebra") for i in range(3)}
+        local = dict(base)
+        local['3'] = Session("2025-02-01", "Added here")
+        # The other program inserted a row at the top and removed the last one
+        external = {'0': Session("2024-12-31", "Inserted"), '1': base['0'], '2': base['1']}
+        
+        merged, local_keys, conflicts, ids = ScheduleMerge.merge(base, local, external)
+        
+        self.assertEqual(ids, {'0': '1', '1': '2', '3': '3'})
+        for old, new in ids.items():
+            self.assertIs(merged[new], local[old])
+        selection = ScheduleMerge.remap_keys({'0', '2', '3', 'header_Today'}, ids, local)
+        self.assertEqual(selection, {'1', '3', 'header_Today'})
+
+class InPlaceRewriteTest(unittest.TestCase):
+    """Base notes must still compare after their file is rewritten in place"""
+    
+    NOTE = "Long notes " * 20
+    
+    def write(self, statuses):
+        rows = "".join(f"2025-01-0{i + 1},T{i + 1},,{status},{self.NOTE}{i}\r\n"
+                       for i, status in enumerate(statuses))
+        # In place, as some editors do: same file, new contents
+        with open(self.path, "r+b" if os.path.exists(self.path) else "wb") as f:
+            f.write(("Date,Focus Topic,Suggested Tasks,Status,Notes\r\n" + rows).encode("utf-8"))
+            f.truncate()
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "schedule.csv")
+        self.write(["Pending", "Pending"])
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def test_untouched_row_edited_here_is_no_conflict(self):
+        storage = CSVStorage(self.path)
+        sessions = SessionStore()
+        for batch, batch_errors, progress in storage.iter_batches():
+            sessions.add_many(batch)
+        storage.attach(sessions)
+        sessions.update('0', notes="Edited here")
+        
+        # The other program only completes T2, leaving T1 as it was
+        self.write(["Pending", "Complete"])
+        with self.assertRaises(OSError):
+            storage.base['0'].notes
+        file_key, external, row_errors = storage.read_external()
+        merged, local_keys, conflicts, ids = ScheduleMerge.merge(storage.base, sessions.snapshot(), external)
+        storage.close()
+        
+        self.assertEqual(conflicts, [])
+        self.assertEqual(merged['0'].notes, "Edited here")
+        self.assertTrue(merged['1'].completed)
+        self.assertEqual(merged['1'].notes, self.NOTE + "1")
+        self.assertEqual(local_keys, {'0'})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_history import EditHistory
+from search_index import SearchIndex
+from session_store import SessionStore
+from storage import SQLiteStorage
+
+LONG_NOTE = "Worked through " + "exercises " * 30 + "and the zebracorn proof"
+
+class LazySQLiteNotesTest(unittest.TestCase):
+    """Long notes stay in the database and are read back by row id"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "schedule.db")
+        connection = SQLiteStorage.connect(self.path)
+        with connection:
+            connection.executemany("INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)", [
+                (0, "2025-01-01", "Algebra", "", 0, LONG_NOTE),
+                (1, "2025-01-02", "Geometry", "", 0, "short note"),
+            ])
+        connection.close()
+        
+        self.storage = SQLiteStorage(self.path)
+        self.sessions = SessionStore()
+        for batch, batch_errors, progress in self.storage.iter_batches():
+            self.sessions.add_many(batch)
+        self.history = EditHistory()
+        self.history.attach(self.sessions)
+        self.storage.attach(self.sessions)
+    
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.directory)
+    
+    def stored_row(self, row_id):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute("SELECT completed, notes FROM sessions WHERE id = ?", (row_id,)).fetchone()
+        finally:
+            connection.close()
+    
+    def test_long_notes_are_lazy(self):
+        self.assertIsNotNone(self.sessions["0"].lazy_note)
+        self.assertIsNone(self.sessions["1"].lazy_note)
+        self.assertEqual(self.sessions["0"].notes, LONG_NOTE)
+    
+    def test_undo_restores_a_note_overwritten_in_the_database(self):
+        self.sessions.update("0", notes="rewritten")
+        self.assertEqual(self.stored_row(0), (0, "rewritten"))
+        
+        self.history.undo()
+        self.assertEqual(self.sessions["0"].notes, LONG_NOTE)
+        self.assertEqual(self.stored_row(0), (0, LONG_NOTE))
+    
+    def test_status_change_keeps_the_note_in_the_row(self):
+        note = self.sessions["0"].lazy_note
+        self.sessions.update("0", completed=True)
+        self.assertIs(self.sessions["0"].lazy_note, note)
+        self.assertTrue(self.storage.in_row(note, "0"))
+        self.assertEqual(self.stored_row(0), (1, LONG_NOTE))
+    
+    def test_search_finds_words_past_the_preview(self):
+        index = SearchIndex()
+        index.attach(self.sessions)
+        index.install(SearchIndex.build(index.start_build()))
+        self.assertEqual(index.search("zebraco"), {"0"})
+        self.assertEqual(index.search("short"), {"1"})
+        self.assertEqual(index.search("bracorn"), set())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionStore
+from workspace import WorkspaceStorage
+
+class WorkspaceSaveTest(unittest.TestCase):
+    """Saving a workspace rewrites only the files holding unsaved edits"""
+    
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ("a.csv", "b.csv", "c.csv"):
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8", newline="") as f:
+                f.write("Date,Focus Topic,Suggested Tasks,Status,Notes\r\n"
+                        f"2025-01-01,{name} first,,Pending,\r\n"
+                        f"2025-01-02,{name} second,,Pending,\r\n")
+        self.storage = WorkspaceStorage(self.directory)
+        self.sessions = SessionStore()
+        for batch, errors, progress in self.storage.iter_batches():
+            self.sessions.add_many(batch)
+        self.storage.attach(self.sessions)
+    
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.directory)
+    
+    def inodes(self):
+        return [os.stat(path).st_ino for path in self.storage.sources]
+    
+    def key(self, file_index, row_id):
+        return str(file_index * WorkspaceStorage.ROW_STRIDE + row_id)
+    
+    def test_only_dirty_files_are_rewritten(self):
+        before = self.inodes()
+        self.sessions.update(self.key(1, 1), completed=True)
+        snapshot = self.sessions.snapshot()
+        # Made after the snapshot, so not part of this save
+        self.sessions.update(self.key(2, 0), notes="Later")
+        
+        self.assertGreater(self.storage.save(snapshot), 0)
+        self.sessions.mark_clean(snapshot.version)
+        after = self.inodes()
+        self.assertEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+        self.assertEqual(after[2], before[2])
+        with open(self.storage.sources[1], encoding="utf-8") as f:
+            self.assertIn("b.csv second,,Complete", f.read())
+        
+        # The later edit is still dirty and goes out with the next save
+        self.assertEqual(self.sessions.dirty_keys(self.sessions.version), [self.key(2, 0)])
+        self.storage.save(self.sessions.snapshot())
+        self.sessions.mark_clean(self.sessions.version)
+        self.assertEqual(self.inodes()[:2], after[:2])
+        self.assertNotEqual(self.inodes()[2], after[2])
+        self.assertEqual(self.storage.save(self.sessions.snapshot()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,226 @@
+import tkinter as tk
+from tkinter import ttk
+
+class VirtualTreeview(tk.Frame):
+    """Treeview that only materializes the rows inside the visible viewport"""
+    
+    OVERSCAN = 10  # Extra rows kept above and below the viewport
+    DEFAULT_ROW_HEIGHT = 20
+    DEFAULT_HEADING_HEIGHT = 24
+    
+    def __init__(self, parent, columns, row_builder):
+        super().__init__(parent)
+        # row_builder(iid) -> (values, tags) for a logical row
+        self.row_builder = row_builder
+        self.rows = []
+        self._positions = None
+        self._selected = set()
+        self._first = 0
+        self._window_start = 0
+        self._window_end = 0
+        self._row_height = None
+        self._heading_height = None
+        
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        
+        # The scrollbar is driven by the logical row count, not the Treeview
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.tree.bind("<Configure>", lambda e: self._render())
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        # A plain click replaces the whole selection, including rows scrolled out of view
+        self.tree.bind("<ButtonPress-1>", lambda e: self._selected.clear())
+        self.tree.bind("<Control-ButtonPress-1>", lambda e: None)
+        self.tree.bind("<Shift-ButtonPress-1>", lambda e: None)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_units(3))
+    
+    def set_rows(self, rows):
+        """Replace the logical rows (a sequence of iids) and redraw the viewport"""
+        self.rows = rows
+        self._positions = None
+        self._selected.intersection_update(rows)
+        self._first = min(self._first, max(0, len(rows) - 1))
+        self._render(force=True)
+    
+    def refresh(self):
+        """Rebuild the materialized rows from the row builder"""
+        self._render(force=True)
+    
+    def contains(self, iid):
+        """Return True if the iid is one of the logical rows"""
+        if self._positions is None:
+            self._positions = {row: i for i, row in enumerate(self.rows)}
+        return iid in self._positions
+    
+    def update_row(self, iid):
+        """Re-read a single row from the row builder if it is materialized"""
+        if self.tree.exists(iid):
+            values, tags = self.row_builder(iid)
+            self.tree.item(iid, values=values, tags=tags)
+    
+    def insert_row(self, position, iid):
+        """Insert a logical row without rebuilding the rest of the view"""
+        self.rows.insert(position, iid)
+        self._rows_moved(position, 1)
+    
+    def delete_row(self, iid):
+        """Remove a logical row without rebuilding the rest of the view"""
+        position = self.index(iid)
+        del self.rows[position]
+        self._selected.discard(iid)
+        self._rows_moved(position, -1)
+    
+    def _rows_moved(self, position, delta):
+        """Keep the viewport on the same rows after an insert or delete"""
+        self._positions = None
+        if position < self._first:
+            self._first = max(0, self._first + delta)
+        # Only the materialized window needs redrawing, and only if it was affected
+        if position <= self._window_end:
+            self._render(force=True)
+        else:
+            self._update_scrollbar()
+    
+    def index(self, iid):
+        """Return the logical position of an iid"""
+        if self._positions is None:
+            self._positions = {row: i for i, row in enumerate(self.rows)}
+        return self._positions[iid]
+    
+    def selection(self):
+        """Return the logical selection in row order"""
+        if not self._selected:
+            return ()
+        return tuple(sorted(self._selected, key=self.index))
+    
+    def set_selection(self, iids):
+        """Replace the logical selection, e.g. once rows have been re-keyed"""
+        self._selected = set(iids)
+        self._render(force=True)
+    
+    def heading(self, column, **kwargs):
+        return self.tree.heading(column, **kwargs)
+    
+    def column(self, column, **kwargs):
+        return self.tree.column(column, **kwargs)
+    
+    def tag_configure(self, tag, **kwargs):
+        return self.tree.tag_configure(tag, **kwargs)
+    
+    def bind_rows(self, sequence, func):
+        """Bind an event on the underlying Treeview"""
+        self.tree.bind(sequence, func, add="+")
+    
+    def yview(self, *args):
+        """Scrollbar command: translate moveto/scroll into a logical top row"""
+        if not args:
+            return
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= max(1, self._capacity() - 1)
+            self._scroll_units(amount)
+    
+    def _scroll_units(self, amount):
+        self._scroll_to(self._first + amount)
+        return "break"
+    
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS reports small deltas
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_units(-3 * delta)
+    
+    def _capacity(self):
+        """Number of rows that fit in the viewport"""
+        row_height = self._row_height or self.DEFAULT_ROW_HEIGHT
+        heading_height = self._heading_height or self.DEFAULT_HEADING_HEIGHT
+        return max(1, (self.tree.winfo_height() - heading_height) // row_height)
+    
+    def _scroll_to(self, first):
+        first = max(0, min(first, len(self.rows) - self._capacity()))
+        if first == self._first and self._window_covers(first):
+            return
+        self._first = first
+        self._render()
+    
+    def _window_covers(self, first):
+        return (self._window_start <= first
+                and first + self._capacity() <= self._window_end)
+    
+    def _render(self, force=False):
+        """Materialize the rows around the viewport and position the Treeview"""
+        capacity = self._capacity()
+        total = len(self.rows)
+        self._first = max(0, min(self._first, total - capacity))
+        
+        if force or not self._window_covers(self._first):
+            start = max(0, self._first - self.OVERSCAN)
+            end = min(total, self._first + capacity + self.OVERSCAN)
+            focus = self.tree.focus()
+            
+            self.tree.delete(*self.tree.get_children())
+            for iid in self.rows[start:end]:
+                values, tags = self.row_builder(iid)
+                self.tree.insert("", "end", iid=iid, values=values, tags=tags)
+            self._window_start, self._window_end = start, end
+            
+            visible_selection = [iid for iid in self.rows[start:end] if iid in self._selected]
+            if visible_selection:
+                self.tree.selection_set(visible_selection)
+            if focus and self.tree.exists(focus):
+                self.tree.focus(focus)
+        
+        window = self._window_end - self._window_start
+        if window:
+            self.tree.yview_moveto((self._first - self._window_start) / window)
+        self._measure_rows()
+        self._update_scrollbar()
+    
+    def _measure_rows(self):
+        """Pick up the real row and heading height once a row is on screen"""
+        if self._row_height is not None or self._window_start == self._window_end:
+            return
+        bbox = self.tree.bbox(self.rows[self._first])
+        if bbox:
+            self._heading_height = bbox[1]
+            self._row_height = bbox[3]
+    
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if not total:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        self.scrollbar.set(self._first / total,
+                           min(1.0, (self._first + self._capacity()) / total))
+    
+    def _on_tree_scroll(self, first, last):
+        """Follow scrolling done by the Treeview itself, e.g. keyboard navigation"""
+        window = self._window_end - self._window_start
+        if not window:
+            return
+        top = self._window_start + round(float(first) * window)
+        if top == self._first:
+            return
+        self._first = top
+        # Slide the window once the viewport gets close to its edge
+        margin = self.OVERSCAN // 2
+        if ((top - self._window_start < margin and self._window_start > 0)
+                or (self._window_end - (top + self._capacity()) < margin
+                    and self._window_end < len(self.rows))):
+            self._render(force=True)
+        else:
+            self._update_scrollbar()
+    
+    def _on_select(self, event):
+        """Mirror the selection of the materialized rows into the logical selection"""
+        materialized = self.rows[self._window_start:self._window_end]
+        self._selected.difference_update(materialized)
+        self._selected.update(self.tree.selection())
@@ -0,0 +1,127 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from csv_loader import CSVLoader
+from csv_writer import CSVWriter
+from edit_journal import EditJournal
+from lazy_notes import LazyNote
+from schedule_cache import ScheduleCache
+
+def parse_schedule_file(file_path, base):
+    """Process pool worker: parse one CSV into picklable data keyed by global row id"""
+    sessions = {}
+    errors = []
+    name = os.path.basename(file_path)
+    try:
+        for batch, batch_errors, progress in CSVLoader.iter_batches(file_path):
+            for key, info in batch.items():
+                sessions[str(base + int(key))] = info
+            errors.extend((f"{name}:{line}", message, base + row_id, raw)
+                          for line, message, row_id, raw in batch_errors)
+    except Exception as e:
+        # One unreadable file shouldn't stop the rest of the workspace loading
+        return ScheduleCache.pack(file_path, {}, [(name, str(e) or type(e).__name__, base, None)])
+    return ScheduleCache.pack(file_path, sessions, errors)
+
+class WorkspaceStorage:
+    """All CSV schedules in a folder, loaded in parallel and shown as one
+    
+    Row ids are file number * ROW_STRIDE + the row's id within its file, so
+    every row knows its source file and ids stay plain integers. Each file
+    keeps its own edit journal, and saving rewrites only files with changes.
+    """
+    
+    # Upper bound on rows per file; keeps row ids of different files apart
+    ROW_STRIDE = 10 ** 9
+    
+    needs_caching = False
+    # External changes are only detected for a single CSV file
+    watch_path = None
+    
+    def __init__(self, folder):
+        self.folder = folder
+        self.sources = sorted(os.path.join(folder, name) for name in os.listdir(folder)
+                              if name.lower().endswith(".csv") and os.path.isfile(os.path.join(folder, name)))
+        self.sessions = None
+        self.journals = []
+        self.skipped_rows = {}  # file number -> (row id, raw bytes) of rows that failed to parse
+    
+    def source_index(self, key):
+        return int(key) // self.ROW_STRIDE
+    
+    def source_name(self, key):
+        """File name a row came from, for the Source column"""
+        return os.path.basename(self.sources[self.source_index(key)])
+    
+    def iter_batches(self, cancel_event=None):
+        """Parse every file in a process pool, yielding one batch per file as it finishes"""
+        if not self.sources:
+            raise ValueError(f"No CSV files in {self.folder}")
+        self.skipped_rows = {}
+        
+        # Spawned rather than forked: this runs on a job thread while Tk has threads of its own
+        with ProcessPoolExecutor(max_workers=min(len(self.sources), os.cpu_count() or 1),
+                                 mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = {executor.submit(parse_schedule_file, path, index * self.ROW_STRIDE): path
+                       for index, path in enumerate(self.sources)}
+            for done, future in enumerate(as_completed(futures), 1):
+                data = future.result()
+                for row_id, raw in CSVLoader.skipped_rows(data['errors']):
+                    self.skipped_rows.setdefault(self.source_index(row_id), []).append((row_id, raw))
+                yield ScheduleCache.unpack(futures[future], data), data['errors'], done / len(futures)
+                if cancel_event is not None and cancel_event.is_set():
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    return
+    
+    def attach(self, sessions, on_threshold=None):
+        """Replay each file's journal, then journal new edits to the file they belong to"""
+        self.sessions = sessions
+        sessions.mark_clean(sessions.version)
+        replayed = 0
+        self.journals = []
+        for index, path in enumerate(self.sources):
+            journal = EditJournal(path, on_threshold=on_threshold, base=index * self.ROW_STRIDE)
+            replayed += journal.replay_into(sessions)
+            self.journals.append(journal)
+        sessions.add_listener(self.record)
+        return bool(replayed)
+    
+    def record(self, keys):
+        for index, file_keys in self._by_source(keys).items():
+            self.journals[index].record(self.sessions, file_keys)
+    
+    def _by_source(self, keys):
+        groups = {}
+        for key in keys:
+            groups.setdefault(self.source_index(key), []).append(key)
+        return groups
+    
+    def save(self, snapshot, backups=0):
+        """Rewrite the files that have unsaved changes up to the snapshot's version; returns bytes written"""
+        changed = set(self._by_source(self.sessions.dirty_keys(snapshot.version)))
+        if not changed:
+            return 0
+        
+        rows = {index: {} for index in changed}
+        for key, info in snapshot.items():
+            file_rows = rows.get(self.source_index(key))
+            if file_rows is not None:
+                file_rows[key] = info
+        
+        notes_column = CSVWriter.HEADER.index('Notes')
+        size = 0
+        for index in sorted(changed):
+            file_rows = rows[index]
+            
+            def move(temp_path, offsets):
+                LazyNote.replace_file(file_rows, temp_path, self.sources[index], notes_column, offsets)
+            
+            size += CSVWriter.save_schedule(self.sources[index], file_rows, backups, move=move,
+                                            skipped_rows=self.skipped_rows.get(index, ()))
+            self.journals[index].compact(snapshot.version)
+        return size
+    
+    def close(self):
+        for journal in self.journals:
+            journal.close()
+        self.journals = []